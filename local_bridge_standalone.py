@@ -1,17 +1,119 @@
 import sys
 import os
 import serial
-import serial.tools.list_ports
-import requests
+import struct
+import threading
 import time
 import json
 
+# requests 和 serial.tools 导入较慢，放到用到时再导入，
+# 云端探测线程会顺带在后台完成 requests 的导入
+
+class HealthProbe(threading.Thread):
+    """后台探测云端 /health/，与串口扫描同时进行"""
+    def __init__(self, cloud_url, timeout=10):
+        super().__init__(daemon=True)
+        self.url = f"{cloud_url.rstrip('/')}/health/"
+        self.timeout = timeout
+        self.status_code = None
+        self.error = None
+        
+    def run(self):
+        try:
+            import requests
+            self.status_code = requests.get(self.url, timeout=self.timeout).status_code
+        except Exception as e:
+            self.error = e
+
+# 串口录制文件：文件头为魔数和录制开始的 Unix 时间（double），
+# 之后每条记录为 距上一条的微秒数(uint32) + 数据长度(uint16) + 原始字节
+RECORD_MAGIC = b"RRC1"
+RECORD_START = struct.Struct('<d')
+RECORD_HEADER = struct.Struct('<IH')
+FRAME_LENGTH = 10
+
+# 上传结果：限流重试用尽或等待重启超时时数据未上传，但云端可达，不计入网络错误
+SEND_OK = 'ok'
+SEND_FAILED = 'failed'
+SEND_THROTTLED = 'throttled'
+SEND_UNAVAILABLE = 'unavailable'
+# 服务器重启（503）时等待并重发同一条数据的最长秒数
+RESTART_WAIT = 120
+
+def retry_after_seconds(response, default=1.0):
+    """读取 Retry-After 头（秒数），缺失或无法解析时使用默认值"""
+    try:
+        return max(0.0, float(response.headers.get('Retry-After', default)))
+    except ValueError:
+        return default
+
+class SerialRecorder:
+    """把串口收到的原始字节连同时间戳写入录制文件"""
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.file.write(RECORD_MAGIC + RECORD_START.pack(time.time()))
+        self.last = time.perf_counter()
+        
+    def write(self, data):
+        now = time.perf_counter()
+        delta = min(int((now - self.last) * 1_000_000), 0xFFFFFFFF)
+        self.last = now
+        for i in range(0, len(data), 0xFFFF):
+            chunk = data[i:i + 0xFFFF]
+            self.file.write(RECORD_HEADER.pack(delta, len(chunk)) + chunk)
+            delta = 0
+        self.file.flush()
+        
+    def close(self):
+        self.file.close()
+
+def read_recording(path):
+    """逐条读取录制文件，返回 (距开始的秒数, 原始字节)"""
+    with open(path, 'rb') as f:
+        if f.read(len(RECORD_MAGIC)) != RECORD_MAGIC:
+            raise ValueError(f"不是串口录制文件: {path}")
+        f.read(RECORD_START.size)
+        offset_us = 0
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            delta, length = RECORD_HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            offset_us += delta
+            yield offset_us / 1_000_000, data
+
+def split_frames(buffer):
+    """从缓冲区中切出完整帧（按帧头 0x53 0x59 对齐），未完整的部分留在缓冲区"""
+    frames = []
+    while True:
+        start = buffer.find(b"\x53\x59")
+        if start < 0:
+            # 保留最后一个字节，它可能是下一个帧头的一半
+            del buffer[:max(0, len(buffer) - 1)]
+            return frames
+        if len(buffer) - start < FRAME_LENGTH:
+            del buffer[:start]
+            return frames
+        frames.append(bytes(buffer[start:start + FRAME_LENGTH]))
+        del buffer[:start + FRAME_LENGTH]
+
 class SimpleBridge:
-    def __init__(self, cloud_url):
+    def __init__(self, cloud_url, token=None, recorder=None, verbose=True, max_retries=3,
+                 restart_wait=RESTART_WAIT):
         self.cloud_url = cloud_url.rstrip('/')
+        self.token = token
+        self.max_retries = max_retries
+        self.restart_wait = restart_wait
+        self.recorder = recorder
+        self.verbose = verbose
         self.serial_port = None
+        self.session = None
         
     def find_ports(self):
+        import serial.tools.list_ports
         ports = serial.tools.list_ports.comports()
         available_ports = []
         
@@ -57,30 +159,75 @@ class SimpleBridge:
             return False
     
     def send_to_cloud(self, data):
-        try:
-            response = requests.post(
-                f"{self.cloud_url}/radar/api/radar-data/",
-                json=data,
-                timeout=8,  # 超时时间
-                headers={'Content-Type': 'application/json'}
-            )
+        """
+        上传一条数据。被限流（429）时按 Retry-After 等待后重发同一条，最多重试 max_retries 次；
+        服务器重启（503）时保留本条数据，在 restart_wait 秒内持续等待并重发，
+        期间服务器下线导致的连接失败也继续重试。
+        """
+        import requests
+        if self.session is None:
+            # 复用连接，避免每次上传都重新握手
+            self.session = requests.Session()
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        throttled = 0
+        restart_deadline = None
+        while True:
+            try:
+                response = self.session.post(
+                    f"{self.cloud_url}/radar/api/radar-data/",
+                    json=data,
+                    timeout=8,  # 超时时间
+                    headers=headers
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if restart_deadline is not None and time.monotonic() < restart_deadline:
+                    # 服务器重启期间暂时连不上，稍后重发
+                    time.sleep(1)
+                    continue
+                if isinstance(e, requests.exceptions.Timeout):
+                    print("请求超时，可能网络较慢")
+                else:
+                    print(f"无法连接到云端: {self.cloud_url}")
+                return SEND_FAILED
+            except Exception as e:
+                print(f"发送错误: {e}")
+                return SEND_FAILED
             
             if response.status_code == 200:
-                print(f"数据发送成功: 值={data['value']}")
-                return True
+                if self.verbose:
+                    print(f"数据发送成功: 值={data['value']}")
+                return SEND_OK
+            elif response.status_code == 401:
+                print("桥接器令牌无效，请检查 BRIDGE_TOKEN")
+                return SEND_FAILED
+            elif response.status_code == 429:
+                # 被限流：不计入网络错误，等待后重发同一条数据
+                if throttled >= self.max_retries:
+                    if self.verbose:
+                        print(f"云端持续限流，本条数据未上传: 值={data['value']}")
+                    return SEND_THROTTLED
+                throttled += 1
+                retry_after = retry_after_seconds(response)
+                if self.verbose:
+                    print(f"云端限流，{retry_after:.0f} 秒后重发")
+                time.sleep(retry_after)
+            elif response.status_code == 503:
+                # 服务器正在重启：不计入网络错误，保留本条数据等待重发
+                if restart_deadline is None:
+                    restart_deadline = time.monotonic() + self.restart_wait
+                if time.monotonic() >= restart_deadline:
+                    if self.verbose:
+                        print(f"云端长时间不可用，本条数据未上传: 值={data['value']}")
+                    return SEND_UNAVAILABLE
+                retry_after = retry_after_seconds(response)
+                if self.verbose:
+                    print(f"云端正在重启，{retry_after:.0f} 秒后重发")
+                time.sleep(retry_after)
             else:
                 print(f"云端响应错误: {response.status_code}")
-                return False
-                
-        except requests.exceptions.ConnectionError:
-            print(f"无法连接到云端: {self.cloud_url}")
-            return False
-        except requests.exceptions.Timeout:
-            print("请求超时，可能网络较慢")
-            return False
-        except Exception as e:
-            print(f"发送错误: {e}")
-            return False
+                return SEND_FAILED
     
     def parse_radar_data(self, raw_data):
         """解析雷达数据"""
@@ -102,7 +249,44 @@ class SimpleBridge:
             "hex_value": f"0x{value:02X}"
         }
     
-    def run(self):
+    def check_cloud(self, probe):
+        """等待云端探测结果；失败时可以继续连接或重新输入网址"""
+        while True:
+            probe.join()
+            if probe.status_code == 200:
+                print("云端连接测试成功")
+                return True
+            if probe.status_code is not None:
+                print(f"云端响应异常: {probe.status_code}")
+                retry = input("是否继续连接？(y/n): ")
+                if retry.lower() == 'y':
+                    return True
+            else:
+                print(f"云端连接测试失败: {probe.error}")
+                retry = input("是否重新输入网址？(y/n): ")
+                if retry.lower() != 'y':
+                    print("程序退出")
+                    return False
+            
+            self.cloud_url = prompt_cloud_url().rstrip('/')
+            print("正在测试云端连接...")
+            probe = HealthProbe(self.cloud_url)
+            probe.start()
+    
+    def process_frame(self, raw_data, sensor_id):
+        """解析一帧并上传；解析失败返回 None，否则返回 send_to_cloud 的上传结果"""
+        parsed = self.parse_radar_data(raw_data)
+        if not parsed:
+            return None
+        cloud_data = {
+            "sensor_id": sensor_id,
+            "value": parsed["value"],
+            "hex_value": parsed["hex_value"],
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        return self.send_to_cloud(cloud_data)
+    
+    def run(self, health_probe=None):
         """运行监控"""
         print("正在扫描串口...")
         ports = self.find_ports()
@@ -128,6 +312,10 @@ class SimpleBridge:
             print("未发现雷达设备")
             return
         
+        # 串口扫描期间云端探测已在后台进行
+        if health_probe is not None and not self.check_cloud(health_probe):
+            return
+        
         # 连接雷达
         if not self.connect(radar_port):
             return
@@ -149,24 +337,18 @@ class SimpleBridge:
                     
                     if self.serial_port.in_waiting >= 10:
                         raw_data = self.serial_port.read(10)
+                        if self.recorder:
+                            self.recorder.write(raw_data)
                         print(f"接收数据: {raw_data.hex().upper()}")
                         
-                        parsed = self.parse_radar_data(raw_data)
-                        if parsed:
-                            cloud_data = {
-                                "sensor_id": f"LOCAL_RADAR_{radar_port.replace('COM', '')}",
-                                "value": parsed["value"],
-                                "hex_value": parsed["hex_value"],
-                                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
-                            }
-                            
-                            if self.send_to_cloud(cloud_data):
-                                consecutive_errors = 0
-                            else:
-                                consecutive_errors += 1
-                                print(f"发送失败计数: {consecutive_errors}/{max_errors}")
-                        else:
+                        sent = self.process_frame(raw_data, f"LOCAL_RADAR_{radar_port.replace('COM', '')}")
+                        if sent is None:
                             print("数据解析失败")
+                        elif sent == SEND_FAILED:
+                            consecutive_errors += 1
+                            print(f"发送失败计数: {consecutive_errors}/{max_errors}")
+                        else:
+                            consecutive_errors = 0
                     
                     if consecutive_errors >= max_errors:
                         print(f"连续 {max_errors} 次发送失败，可能网络有问题")
@@ -188,12 +370,131 @@ class SimpleBridge:
             if self.serial_port and self.serial_port.is_open:
                 self.serial_port.close()
                 print("串口已关闭")
+            if self.recorder:
+                self.recorder.close()
+                print("录制文件已保存")
 
-def main():
-    print("雷达数据云端桥接器 v1.0")
-    print("=" * 50)
+def normalize_url(cloud_url):
+    """自动添加协议"""
+    if not cloud_url.startswith(('http://', 'https://')):
+        cloud_url = 'https://' + cloud_url
+    return cloud_url
+
+class ReplayStats:
+    """回放计数，多个回放线程共享"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frames = 0
+        self.sent = 0
+        self.throttled = 0
+        self.unavailable = 0
+        self.failed = 0
+        self.invalid = 0
+        
+    def add(self, result):
+        with self.lock:
+            self.frames += 1
+            if result is None:
+                self.invalid += 1
+            elif result == SEND_OK:
+                self.sent += 1
+            elif result == SEND_THROTTLED:
+                self.throttled += 1
+            elif result == SEND_UNAVAILABLE:
+                self.unavailable += 1
+            else:
+                self.failed += 1
+
+def replay_recording(path, cloud_url, token, speed, sensor_id, stats):
+    """按录制时的节奏（speed 倍速，0 为不等待）把录制数据送入解析/上传流程"""
+    # 不等待重试：429/503 直接计数，测到的是云端实际接收的速度
+    bridge = SimpleBridge(cloud_url, token, verbose=False, max_retries=0, restart_wait=0)
+    buffer = bytearray()
+    start = time.perf_counter()
+    for offset, data in read_recording(path):
+        if speed:
+            delay = start + offset / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        buffer.extend(data)
+        for frame in split_frames(buffer):
+            stats.add(bridge.process_frame(frame, sensor_id))
+
+def read_tokens(path):
+    """令牌文件每行一个令牌，忽略空行和 # 开头的行"""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+def run_replay(paths, cloud_url, tokens=None, speed=1.0, copies=1):
+    """
+    并行回放多个录制文件，每个文件可复制多份以模拟多台桥接器。
+    云端按令牌（匿名时按 IP）对每个桥接器限流，tokens 中的令牌依次分配给各个回放流，
+    令牌少于回放流时多个流共享同一个桥接器的额度。
+    """
+    cloud_url = normalize_url(cloud_url)
+    tokens = tokens or [None]
+    stats = ReplayStats()
+    threads = []
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for i in range(copies):
+            sensor_id = f"REPLAY_{stem}_{i + 1}"
+            token = tokens[len(threads) % len(tokens)]
+            thread = threading.Thread(
+                target=replay_recording,
+                args=(path, cloud_url, token, speed, sensor_id, stats),
+                daemon=True
+            )
+            threads.append(thread)
     
-    # 获取云端网址
+    speed_text = f"{speed:g}x" if speed else "最大速度"
+    print(f"开始回放: {len(paths)} 个文件 x {copies} 份, {speed_text} -> {cloud_url}")
+    if len(tokens) < len(threads):
+        print(f"注意: {len(threads)} 个回放流共享 {len(tokens)} 个桥接器额度，"
+              f"超出单个桥接器限流的部分会计入“限流”，可用 --token-file 为每个流提供令牌")
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    print("-" * 50)
+    print(f"帧数: {stats.frames}  成功: {stats.sent}  限流(429): {stats.throttled}  "
+          f"重启中(503): {stats.unavailable}  失败: {stats.failed}  无效帧: {stats.invalid}")
+    print(f"耗时: {elapsed:.2f} 秒  发送: {stats.frames / elapsed if elapsed else 0:.1f} 帧/秒  "
+          f"云端接收: {stats.sent / elapsed if elapsed else 0:.1f} 帧/秒")
+    return stats
+
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="雷达数据云端桥接器")
+    parser.add_argument('--record', metavar='FILE', help="运行时把串口原始数据录制到文件")
+    parser.add_argument('--replay', metavar='FILE', nargs='+', help="回放录制文件，代替真实串口")
+    parser.add_argument('--url', help="回放时的网站地址")
+    parser.add_argument('--token', default=os.environ.get('BRIDGE_TOKEN'), help="桥接器令牌，默认读取 BRIDGE_TOKEN")
+    parser.add_argument('--token-file', metavar='FILE',
+                        help="回放时每行一个令牌，依次分配给各个回放流（可用 manage.py create_bridge_token 批量生成）")
+    parser.add_argument('--speed', default='1', help="回放倍速，max 表示不等待")
+    parser.add_argument('--copies', type=int, default=1, help="每个录制文件并行回放的份数")
+    args = parser.parse_args(argv)
+    if args.replay:
+        if not args.url:
+            parser.error("回放需要 --url")
+        try:
+            args.speed = 0.0 if args.speed == 'max' else float(args.speed)
+        except ValueError:
+            parser.error("--speed 必须是数字或 max")
+        try:
+            args.tokens = read_tokens(args.token_file) if args.token_file else [args.token]
+        except OSError as e:
+            parser.error(f"无法读取令牌文件: {e}")
+        if not args.tokens:
+            parser.error("令牌文件为空")
+    return args
+
+def prompt_cloud_url():
+    """读取并规范化云端网址"""
     while True:
         cloud_url = input("请输入网站地址: ").strip()
         
@@ -201,39 +502,41 @@ def main():
             print("网址不能为空，请重新输入")
             continue
             
-        # 自动添加协议
-        if not cloud_url.startswith(('http://', 'https://')):
-            cloud_url = 'https://' + cloud_url
+        cloud_url = normalize_url(cloud_url)
             
         print(f"目标云端: {cloud_url}")
-        
-        # 测试连接
-        try:
-            print("正在测试云端连接...")
-            test_response = requests.get(f"{cloud_url}/health/", timeout=10)
-            if test_response.status_code == 200:
-                print("云端连接测试成功")
-                break
-            else:
-                print(f"云端响应异常: {test_response.status_code}")
-                retry = input("是否继续连接？(y/n): ")
-                if retry.lower() == 'y':
-                    break
-        except Exception as e:
-            print(f"云端连接测试失败: {e}")
-            retry = input("是否重新输入网址？(y/n): ")
-            if retry.lower() != 'y':
-                print("程序退出")
-                return
+        return cloud_url
+
+def main(record_path=None):
+    print("雷达数据云端桥接器 v1.0")
+    print("=" * 50)
+    
+    # 获取云端网址
+    cloud_url = prompt_cloud_url()
+    
+    # 测试连接：在后台进行，不阻塞串口扫描
+    print("正在测试云端连接...")
+    probe = HealthProbe(cloud_url)
+    probe.start()
+    
+    # 接入令牌：优先读取环境变量 BRIDGE_TOKEN
+    token = os.environ.get('BRIDGE_TOKEN') or input("请输入桥接器令牌（没有可直接回车）: ").strip()
     
     # 启动桥接器
     print("\n开始启动桥接器...")
-    bridge = SimpleBridge(cloud_url)
-    bridge.run()
+    recorder = SerialRecorder(record_path) if record_path else None
+    if recorder:
+        print(f"串口数据将录制到: {record_path}")
+    bridge = SimpleBridge(cloud_url, token or None, recorder=recorder)
+    bridge.run(probe)
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.replay:
+        run_replay(args.replay, args.url, args.tokens, args.speed, args.copies)
+        sys.exit(0)
     try:
-        main()
+        main(args.record)
     except KeyboardInterrupt:
         print("\n程序被用户中断")
     except Exception as e:
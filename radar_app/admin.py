@@ -1,5 +1,143 @@
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
 from django.contrib import admin
-from .models import RadarSensor, RadarData
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import RadarSensor, RadarData, BridgeToken, FocusSession
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(obj):
+    """把 (timestamp, id) 编码为翻页游标"""
+    micros = (obj.timestamp - _EPOCH) // timedelta(microseconds=1)
+    return f"{micros}_{obj.pk}"
+
+
+def decode_cursor(value):
+    """解析翻页游标，格式错误时返回 None"""
+    try:
+        micros, pk = value.split('_', 1)
+        return _EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """大表分页器：PostgreSQL 上用查询计划的估算行数代替 COUNT(*)"""
+
+    # 估算值低于该阈值时才做精确计数
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        estimate = self._estimate_count()
+        if estimate is None or estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
+
+    def _estimate_count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        try:
+            with connection.cursor() as cursor:
+                if not queryset.query.where:
+                    cursor.execute(
+                        "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                        [queryset.model._meta.db_table]
+                    )
+                    row = cursor.fetchone()
+                    return int(row[0]) if row and row[0] >= 0 else None
+                sql, params = queryset.order_by().query.sql_with_params()
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]['Plan']['Plan Rows'])
+        except Exception:
+            return None
+
+
+class TimeRangeFilter(admin.SimpleListFilter):
+    """按最近时间范围过滤，走 timestamp 索引的范围扫描"""
+    title = '时间范围'
+    parameter_name = 'range'
+
+    RANGES = {
+        '10m': ('最近10分钟', timedelta(minutes=10)),
+        '1h': ('最近1小时', timedelta(hours=1)),
+        '24h': ('最近24小时', timedelta(hours=24)),
+        '7d': ('最近7天', timedelta(days=7)),
+    }
+
+    def lookups(self, request, model_admin):
+        return [(key, label) for key, (label, _) in self.RANGES.items()]
+
+    def queryset(self, request, queryset):
+        selected = self.RANGES.get(self.value())
+        if selected is None:
+            return queryset
+        return queryset.filter(timestamp__gte=timezone.now() - selected[1])
+
+
+class KeysetChangeList(ChangeList):
+    """按 (timestamp, id) 键集翻页的列表，避免 OFFSET 和全表计数"""
+
+    # 游标参数：只取比上一页最后一行更早的数据
+    cursor_var = 'before'
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(self.cursor_var, None)
+        return lookup_params
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        cursor = decode_cursor(self.params.get(self.cursor_var))
+        if cursor is None:
+            return queryset
+        timestamp, pk = cursor
+        return queryset.filter(
+            Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, pk__lt=pk)
+        )
+
+    def get_results(self, request):
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+        rows = list(self.queryset[:self.list_per_page + 1])
+        has_next = len(rows) > self.list_per_page
+        rows = rows[:self.list_per_page]
+
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = rows
+        self.can_show_all = False
+        self.multi_page = has_next
+        self.paginator = paginator
+        self.next_cursor = encode_cursor(rows[-1]) if has_next else None
+        self.is_first_page = self.cursor_var not in self.params
+
+    def next_page_url(self):
+        return self.get_query_string(
+            {self.cursor_var: self.next_cursor}
+        )
+
+    def first_page_url(self):
+        return self.get_query_string(
+            remove=[self.cursor_var]
+        )
+
 
 @admin.register(RadarSensor)
 class RadarSensorAdmin(admin.ModelAdmin):
@@ -7,4 +145,27 @@ class RadarSensorAdmin(admin.ModelAdmin):
 @admin.register(RadarData)
 class RadarDataAdmin(admin.ModelAdmin):
     list_display = ('sensor', 'value', 'timestamp')
-    list_filter = ('sensor',)
\ No newline at end of file
+    list_filter = (TimeRangeFilter, 'sensor')
+    list_select_related = ('sensor',)
+    list_per_page = 100
+    ordering = ('-timestamp', '-pk')
+    # 只允许按索引顺序浏览，任意列排序会破坏键集翻页
+    sortable_by = ()
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+@admin.register(BridgeToken)
+class BridgeTokenAdmin(admin.ModelAdmin):
+    list_display = ('name', 'is_active', 'created_at')
+    list_filter = ('is_active',)
+    # 令牌通过 create_bridge_token 命令生成，后台只负责启用/停用
+    readonly_fields = ('token_hash',)
+
+    def has_add_permission(self, request):
+        return False
+@admin.register(FocusSession)
+class FocusSessionAdmin(admin.ModelAdmin):
+    list_display = ('sensor_name', 'state', 'focus_value', 'started_at', 'ended_at', 'sample_count')
+    list_filter = ('state', 'sensor_name')
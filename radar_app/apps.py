@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class RadarAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'radar_app'
+
+    def ready(self):
+        # 注册数据库连接信号（SQLite WAL 等）
+        from . import db  # noqa: F401
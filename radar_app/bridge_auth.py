@@ -0,0 +1,97 @@
+"""
+桥接器令牌校验。
+
+令牌以 SHA-256 摘要存储，校验结果缓存在进程内存中，
+正常情况下每个令牌在缓存有效期内只查询一次数据库。
+"""
+import hashlib
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import BridgeToken
+
+# 无效令牌也缓存，避免伪造令牌的请求打到数据库
+_NEGATIVE_TTL = 30
+_MAX_NEGATIVE_ENTRIES = 10000
+
+_verified = {}
+_lock = threading.Lock()
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def generate_token():
+    """生成新令牌，返回 (明文, 摘要)"""
+    token = secrets.token_urlsafe(32)
+    return token, hash_token(token)
+
+
+def get_request_token(request):
+    """从 Authorization: Bearer 或 X-Bridge-Token 请求头读取令牌"""
+    auth = request.headers.get('Authorization', '')
+    if auth.startswith('Bearer '):
+        return auth[7:].strip() or None
+    return request.headers.get('X-Bridge-Token') or None
+
+
+def verify_token(token):
+    """校验令牌，有效时返回桥接器名称，否则返回 None"""
+    digest = hash_token(token)
+    now = time.monotonic()
+    cached = _verified.get(digest)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    row = BridgeToken.objects.filter(
+        token_hash=digest, is_active=True
+    ).values_list('name', flat=True).first()
+
+    ttl = settings.RADAR_BRIDGE_TOKEN_CACHE_TTL if row else _NEGATIVE_TTL
+    with _lock:
+        if row is None and len(_verified) >= _MAX_NEGATIVE_ENTRIES:
+            for key in [k for k, v in _verified.items() if v[0] is None or v[1] <= now]:
+                del _verified[key]
+        _verified[digest] = (row, now + ttl)
+    return row
+
+
+def preload_tokens():
+    """启动时加载全部有效令牌，重启后的第一批请求无需查询数据库"""
+    expires = time.monotonic() + settings.RADAR_BRIDGE_TOKEN_CACHE_TTL
+    rows = BridgeToken.objects.filter(is_active=True).values_list('token_hash', 'name')
+    with _lock:
+        for digest, name in rows:
+            _verified[digest] = (name, expires)
+
+
+def authenticate_bridge(request):
+    """
+    返回用于限流的桥接器标识。
+    未携带令牌时，若允许匿名接入则按客户端 IP 标识，否则返回 None。
+    """
+    token = get_request_token(request)
+    if token:
+        name = verify_token(token)
+        return f"bridge:{name}" if name else None
+    if settings.RADAR_INGEST_REQUIRE_TOKEN:
+        return None
+    return f"anon:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def invalidate_cache():
+    with _lock:
+        _verified.clear()
+
+
+@receiver(post_save, sender=BridgeToken)
+@receiver(post_delete, sender=BridgeToken)
+def _token_changed(sender, **kwargs):
+    # 停用或删除令牌后立即失效本进程缓存
+    invalidate_cache()
@@ -1,13 +1,72 @@
 import json
 import asyncio
 from channels.generic.websocket import AsyncWebsocketConsumer
-from asgiref.sync import sync_to_async
 from django.utils import timezone
 from datetime import timedelta
+import hashlib
 import logging
+import random
+import re
+
+from django.conf import settings
+
+from .db import db_sync_to_async
+from .focus_log import FOCUS_VALUES, classify_window, focus_monitor, focus_writer
+from .lifecycle import CONTROL_GROUP, is_draining
+from .outbound import BACKLOG_SCOPE_KEY, OutboundQueue, outbound_stats
+from .signal_quality import quality_monitor
+from .storage import get_storage
 
 logger = logging.getLogger(__name__)
 
+# 单个连接最多订阅的传感器数量
+MAX_SUBSCRIBED_SENSORS = 200
+# 断流检查间隔（秒）
+QUALITY_CHECK_INTERVAL = 1
+
+_quality_watchdogs = {}
+
+
+def sensor_group_name(sensor_id):
+    """传感器专属的组名，只保留频道层允许的字符"""
+    name = re.sub(r'[^0-9A-Za-z_.-]', '_', str(sensor_id))
+    if len(name) > 80 or name != str(sensor_id):
+        # 替换过字符或过长时追加摘要，避免不同传感器映射到同一组
+        name = f"{name[:60]}.{hashlib.md5(str(sensor_id).encode('utf-8')).hexdigest()[:12]}"
+    return f"radar_sensor_{name}"
+
+
+async def broadcast_sensor_events(channel_layer, messages):
+    """发送到全量组和传感器专属组，订阅了部分传感器的面板只收到自己的数据"""
+    for message in messages:
+        await channel_layer.group_send("radar_group", message)
+        await channel_layer.group_send(sensor_group_name(message['sensor_id']), message)
+
+async def _quality_watchdog(channel_layer):
+    """定时检查各传感器断流并广播质量事件，每个事件循环只运行一个"""
+    while True:
+        try:
+            await asyncio.sleep(QUALITY_CHECK_INTERVAL)
+            events = quality_monitor.check_gaps()
+            for event in events:
+                logger.warning(f"传感器 {event['sensor_id']} 信号异常: {event['reasons']}")
+            await broadcast_sensor_events(channel_layer, events)
+            # 顺带结束已断流传感器的专注区间
+            focus_writer.record(focus_monitor.close_idle())
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.error(f"信号质量检查错误: {e}")
+
+
+def ensure_quality_watchdog(channel_layer):
+    """启动时已创建；连接时再检查一次，任务意外结束时重新创建"""
+    loop = asyncio.get_running_loop()
+    task = _quality_watchdogs.get(loop)
+    if task is None or task.done():
+        _quality_watchdogs[loop] = loop.create_task(_quality_watchdog(channel_layer))
+
+
 class RadarConsumer(AsyncWebsocketConsumer):
     
     def __init__(self, *args, **kwargs):
@@ -19,14 +78,35 @@ class RadarConsumer(AsyncWebsocketConsumer):
         self.last_data_time = None
         self.focus_state = False
         self.warning_shown = False
+        # 为空表示接收全部传感器（radar_group）
+        self.sensor_groups = set()
+        self.outbound = None
+        self.sender_task = None
         
     async def connect(self):
+        if is_draining():
+            # 服务器正在重启：握手阶段关闭只会得到 HTTP 403，
+            # 先接受连接再告知重连延迟，以 1013（稍后重试）关闭
+            await self.accept()
+            await self._send_restarting()
+            await self.close(code=1013)
+            return
         try:
+            await self.channel_layer.group_add(CONTROL_GROUP, self.channel_name)
             await self.channel_layer.group_add("radar_group", self.channel_name)
             await self.accept()
             
+            # 雷达数据经有界队列由独立任务发送，慢客户端不会堵住频道层；
+            # daphne 下按连接写缓冲区的积压判断客户端是否跟得上
+            self.outbound = OutboundQueue(
+                backlog=self.scope.get(BACKLOG_SCOPE_KEY),
+                **settings.RADAR_OUTBOUND_QUEUE
+            )
+            self.sender_task = asyncio.create_task(self._send_loop())
+            
             # 启动连接检查任务
             self.connection_check_task = asyncio.create_task(self.connection_check())
+            ensure_quality_watchdog(self.channel_layer)
             
             # 发送连接状态
             await self.send(text_data=json.dumps({
@@ -45,11 +125,17 @@ class RadarConsumer(AsyncWebsocketConsumer):
         
         if self.connection_check_task and not self.connection_check_task.done():
             self.connection_check_task.cancel()
+        
+        if self.sender_task and not self.sender_task.done():
+            self.sender_task.cancel()
             
         self.is_monitoring = False
         
         try:
+            await self.channel_layer.group_discard(CONTROL_GROUP, self.channel_name)
             await self.channel_layer.group_discard("radar_group", self.channel_name)
+            for group in self.sensor_groups:
+                await self.channel_layer.group_discard(group, self.channel_name)
         except:
             pass
         logger.info(f"WebSocket连接已断开: {close_code}")
@@ -68,6 +154,9 @@ class RadarConsumer(AsyncWebsocketConsumer):
                     'type': 'pong',
                     'timestamp': timezone.now().isoformat()
                 }))
+            elif command == 'subscribe':
+                sensors = data.get('sensors')
+                await self.subscribe_sensors(sensors if isinstance(sensors, list) else [])
             elif command == 'dismiss_warning':
                 # 用户手动关闭警告
                 self.warning_shown = False
@@ -78,6 +167,25 @@ class RadarConsumer(AsyncWebsocketConsumer):
         except Exception as e:
             logger.error(f"消息处理错误: {e}")
 
+    async def subscribe_sensors(self, sensors):
+        """只订阅指定传感器；传空列表恢复接收全部数据"""
+        groups = {sensor_group_name(s) for s in sensors[:MAX_SUBSCRIBED_SENSORS]}
+        
+        if groups and not self.sensor_groups:
+            await self.channel_layer.group_discard("radar_group", self.channel_name)
+        for group in self.sensor_groups - groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
+        for group in groups - self.sensor_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        if not groups and self.sensor_groups:
+            await self.channel_layer.group_add("radar_group", self.channel_name)
+        self.sensor_groups = groups
+        
+        await self.send(text_data=json.dumps({
+            'type': 'subscribed',
+            'sensors': list(sensors[:MAX_SUBSCRIBED_SENSORS])
+        }))
+
     async def start_monitoring(self):
         """启动监测模式 - 需要桥接器连接"""
         if not self.bridge_connected:
@@ -149,21 +257,13 @@ class RadarConsumer(AsyncWebsocketConsumer):
                 value_counts[value] = 0
             value_counts[value] += 1
         
-        # 特定值的计数
-        counts_15 = value_counts.get(15, 0)
-        counts_16 = value_counts.get(16, 0)
-        counts_17 = value_counts.get(17, 0)
-        
         total_data = len(focus_data)
         
         # 判断逻辑：数据都为15，或都为16，或都为17
-        is_all_15 = counts_15 == total_data and total_data > 0
-        is_all_16 = counts_16 == total_data and total_data > 0
-        is_all_17 = counts_17 == total_data and total_data > 0
-        
-        is_focused = is_all_15 or is_all_16 or is_all_17
+        # 区间记录由 focus_monitor 在数据接入时按传感器统一判定，这里只负责界面提示
+        is_focused, focus_value = classify_window(value_counts, total_data)
         
-        logger.info(f"数据分析: 总数={total_data}, 全15={is_all_15}, 全16={is_all_16}, 全17={is_all_17}, 专注={is_focused}")
+        logger.info(f"数据分析: 总数={total_data}, 专注值={focus_value}, 专注={is_focused}")
         
         
         if is_focused:
@@ -176,7 +276,7 @@ class RadarConsumer(AsyncWebsocketConsumer):
                     'type': 'show_cloud',
                     'message': '检测到专注状态！',
                     'data_count': total_data,
-                    'focus_value': 15 if is_all_15 else (16 if is_all_16 else 17)
+                    'focus_value': focus_value
                 }))
                 
                 logger.info("用户进入专注状态")
@@ -197,7 +297,7 @@ class RadarConsumer(AsyncWebsocketConsumer):
                     'message': '注意力分散！请专注！',
                     'data_count': total_data,
                     'counts': value_counts,
-                    'unfocus_values': list(set(focus_data) - {15, 16, 17})
+                    'unfocus_values': list(set(focus_data) - set(FOCUS_VALUES))
                 }))
                 logger.info("⚠️ 显示专注警告")
 
@@ -216,15 +316,11 @@ class RadarConsumer(AsyncWebsocketConsumer):
             'message': '专注监测已停止'
         }))
 
-    @sync_to_async
+    @db_sync_to_async
     def _get_recent_data(self, seconds):
         """获取最近几秒的数据"""
         try:
-            from .models import RadarData
-            time_ago = timezone.now() - timedelta(seconds=seconds)
-            return list(RadarData.objects.filter(
-                timestamp__gte=time_ago
-            ).values_list('value', flat=True)[:50])  # 限制数据量
+            return get_storage().recent_values(seconds, limit=50)  # 限制数据量
         except Exception as e:
             logger.error(f"获取数据失败: {e}")
             return []
@@ -243,17 +339,77 @@ class RadarConsumer(AsyncWebsocketConsumer):
             
             self.last_data_time = timezone.now()
             
-            # 发送数据到前端
-            await self.send(text_data=json.dumps({
+            # 放入发送队列，立即返回
+            if self.outbound is None:
+                return
+            accepted = self.outbound.put(event['sensor_id'], {
                 'type': 'radar_data',
                 'sensor_id': event['sensor_id'],
                 'value': event['value'],
                 'timestamp': event['timestamp']
-            }))
+            })
+            if not accepted:
+                outbound_stats.incr('disconnected_slow')
+                logger.warning("客户端接收过慢，断开连接")
+                self.outbound = None
+                await self.close(code=1013)
             
         except Exception as e:
             logger.error(f"发送数据失败: {e}")
 
+    async def _send_loop(self):
+        """发送队列中的雷达数据，连接写缓冲区积压时暂停，让消息留在有界队列中"""
+        try:
+            while True:
+                message = await self.outbound.get()
+                await self.send(text_data=json.dumps(message))
+                outbound_stats.incr('sent')
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"发送队列出错: {e}")
+
+    async def _flush_outbound(self):
+        """立即发送队列中剩余的数据"""
+        if self.sender_task and not self.sender_task.done():
+            self.sender_task.cancel()
+        while self.outbound is not None and len(self.outbound):
+            await self.send(text_data=json.dumps(await self.outbound.get()))
+            outbound_stats.incr('sent')
+
+    async def signal_quality(self, event):
+        """转发传感器信号质量变化"""
+        try:
+            await self.send(text_data=json.dumps({
+                'type': 'signal_quality',
+                'sensor_id': event['sensor_id'],
+                'status': event['status'],
+                'reasons': event['reasons'],
+                'mean': event['mean'],
+                'std': event['std'],
+            }))
+        except Exception as e:
+            logger.error(f"发送质量事件失败: {e}")
+
+    async def server_draining(self, event):
+        """服务器排空：发送已缓冲的数据，通知客户端随机延迟后重连"""
+        self.is_monitoring = False
+        await self._flush_outbound()
+        try:
+            await self._send_restarting()
+        finally:
+            # 1012：服务重启
+            await self.close(code=1012)
+
+    async def _send_restarting(self):
+        """通知客户端服务器正在重启，并给出随机的重连延迟，避免所有客户端同时重连"""
+        low, high = settings.RADAR_RECONNECT_DELAY_MS
+        await self.send(text_data=json.dumps({
+            'type': 'server_restarting',
+            'message': '服务器正在重启，稍后自动重连',
+            'reconnect_delay': random.randint(low, high)
+        }))
+
     async def connection_check(self):
         """定期检查桥接器连接"""
         while True:
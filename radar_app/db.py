@@ -0,0 +1,46 @@
+"""
+数据库访问辅助。
+
+异步代码中的 ORM 调用统一交给一个固定大小的专用线程池执行：
+每个工作线程持有一条持久连接，连接数上限等于线程数，
+不随 WebSocket 连接数增长。
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from channels.db import DatabaseSyncToAsync
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.RADAR_DB_EXECUTOR_WORKERS,
+                    thread_name_prefix='radar-db',
+                )
+    return _executor
+
+
+def db_sync_to_async(func):
+    """
+    与 channels 的 database_sync_to_async 相同（调用前后清理过期连接），
+    但在专用线程池中运行，而不是 asgiref 的共享线程。
+    """
+    return DatabaseSyncToAsync(func, thread_sensitive=False, executor=get_db_executor())
+
+
+@receiver(connection_created)
+def _configure_sqlite(sender, connection, **kwargs):
+    # WAL 模式允许读写并发，NORMAL 同步级别在 WAL 下仍能保证一致性
+    if connection.vendor == 'sqlite' and settings.RADAR_SQLITE_WAL:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
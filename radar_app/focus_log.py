@@ -0,0 +1,205 @@
+"""
+专注状态区间记录。
+
+FocusMonitor 在进程内按传感器把接入的采样切成固定时长的分析窗口，
+每个窗口只判定一次，与打开了多少个面板无关；
+FocusTracker 累计单个传感器的当前状态，只有状态切换时才产生一条区间记录；
+FocusSessionWriter 缓冲这些记录，按批量或定时在数据库线程池中写入。
+"""
+import logging
+import threading
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .db import get_db_executor
+from .models import FocusSession
+
+logger = logging.getLogger(__name__)
+
+# 专注值：一个窗口内全部采样都等于其中同一个值时视为专注
+FOCUS_VALUES = (15, 16, 17)
+# 分析窗口时长（秒）
+WINDOW_SECONDS = 5
+# 传感器超过该秒数没有数据时结束其当前区间
+IDLE_SECONDS = 60
+
+
+def classify_window(value_counts, total):
+    """判定一个窗口，返回 (是否专注, 专注值)"""
+    for value in FOCUS_VALUES:
+        if total > 0 and value_counts.get(value, 0) == total:
+            return True, value
+    return False, None
+
+
+class FocusTracker:
+    """单个传感器的当前状态区间"""
+
+    def __init__(self, sensor_name=''):
+        self.sensor_name = sensor_name
+        self.current = None
+
+    def update(self, state, focus_value, sample_count, now=None, started_at=None):
+        """
+        记录一个分析窗口的结果，now 为窗口结束时间，started_at 为窗口开始时间。
+        状态或专注值变化时结束上一区间并返回它，否则返回 None。
+        """
+        now = now or timezone.now()
+        current = self.current
+        if current is not None and current.state == state and current.focus_value == focus_value:
+            current.ended_at = now
+            current.sample_count += sample_count
+            current.window_count += 1
+            return None
+
+        finished = self.close()
+        self.current = FocusSession(
+            sensor_name=self.sensor_name,
+            state=state,
+            focus_value=focus_value,
+            started_at=started_at or now,
+            ended_at=now,
+            sample_count=sample_count,
+            window_count=1,
+        )
+        return finished
+
+    def close(self, now=None):
+        """结束当前区间并返回它（没有时返回 None）"""
+        finished, self.current = self.current, None
+        if finished is not None and now is not None:
+            finished.ended_at = max(finished.ended_at, now)
+        return finished
+
+
+class SensorWindow:
+    """单个传感器当前分析窗口内的计数"""
+    __slots__ = ('started', 'last', 'counts', 'total')
+
+    def __init__(self, now):
+        self.started = now
+        self.last = now
+        self.counts = {}
+        self.total = 0
+
+    def add(self, value, now):
+        self.counts[value] = self.counts.get(value, 0) + 1
+        self.total += 1
+        self.last = now
+
+
+class FocusMonitor:
+    """进程内按传感器判定专注状态，由数据接入调用，每个采样 O(1)"""
+
+    def __init__(self, window_seconds=WINDOW_SECONDS, idle_seconds=IDLE_SECONDS):
+        self.window_seconds = window_seconds
+        self.idle_seconds = idle_seconds
+        self._windows = {}
+        self._trackers = {}
+        self._lock = threading.Lock()
+
+    def observe(self, sensor_id, value, now=None):
+        """处理一个采样，返回因状态切换或断流而结束的区间列表"""
+        now = now or timezone.now()
+        finished = []
+        with self._lock:
+            window = self._windows.get(sensor_id)
+            if window is not None and (now - window.started).total_seconds() >= self.window_seconds:
+                self._close_window(sensor_id, window, finished)
+                if (now - window.last).total_seconds() >= self.idle_seconds:
+                    # 断流后重新开始，不把空档算进上一区间
+                    finished.append(self._trackers.pop(sensor_id).close())
+                window = None
+            if window is None:
+                window = self._windows[sensor_id] = SensorWindow(now)
+            window.add(value, now)
+        return [session for session in finished if session is not None]
+
+    def close_idle(self, now=None):
+        """结束长时间没有数据的传感器的窗口和区间"""
+        now = now or timezone.now()
+        finished = []
+        with self._lock:
+            idle = [
+                sensor_id for sensor_id, window in self._windows.items()
+                if (now - window.last).total_seconds() >= self.idle_seconds
+            ]
+            for sensor_id in idle:
+                self._close_window(sensor_id, self._windows[sensor_id], finished)
+                finished.append(self._trackers.pop(sensor_id).close())
+        return [session for session in finished if session is not None]
+
+    def close_all(self):
+        """判定所有未结束的窗口并结束全部区间（进程退出前调用）"""
+        finished = []
+        with self._lock:
+            for sensor_id, window in list(self._windows.items()):
+                self._close_window(sensor_id, window, finished)
+            for tracker in self._trackers.values():
+                finished.append(tracker.close())
+            self._trackers.clear()
+        return [session for session in finished if session is not None]
+
+    def _close_window(self, sensor_id, window, finished):
+        del self._windows[sensor_id]
+        tracker = self._trackers.get(sensor_id)
+        if tracker is None:
+            tracker = self._trackers[sensor_id] = FocusTracker(sensor_id)
+        is_focused, focus_value = classify_window(window.counts, window.total)
+        finished.append(tracker.update(
+            FocusSession.STATE_FOCUSED if is_focused else FocusSession.STATE_DISTRACTED,
+            focus_value,
+            window.total,
+            now=window.last,
+            started_at=window.started,
+        ))
+
+    def reset(self):
+        with self._lock:
+            self._windows.clear()
+            self._trackers.clear()
+
+
+class FocusSessionWriter:
+    """批量写入区间记录，可在任意线程调用，数据库操作在数据库线程池中执行"""
+
+    def __init__(self, batch_size=100, flush_interval=5.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def record(self, sessions):
+        if not sessions:
+            return
+        with self._lock:
+            self._pending.extend(sessions)
+            if len(self._pending) >= self.batch_size:
+                get_db_executor().submit(self.flush)
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_later)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush_later(self):
+        with self._lock:
+            self._timer = None
+        get_db_executor().submit(self.flush)
+
+    def flush(self):
+        """同步写出缓冲的区间"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        close_old_connections()
+        try:
+            FocusSession.objects.bulk_create(batch)
+        except Exception as e:
+            logger.error(f"专注区间写入失败: {e}")
+
+
+focus_monitor = FocusMonitor()
+focus_writer = FocusSessionWriter()
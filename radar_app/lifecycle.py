@@ -0,0 +1,136 @@
+"""
+进程生命周期：部署重启时的排空（drain）和启动后的缓存预热。
+
+在 daphne 下收到 SIGTERM 时先进入排空模式：拒绝新的 WebSocket 和数据接入，
+通知现有连接带随机延迟重连，写出缓冲的专注区间和存储数据，
+完成后（或超时）再交给 daphne 正常停止。
+"""
+import asyncio
+import logging
+import signal
+import sys
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# 所有消费者都加入的控制组，用于广播排空通知
+CONTROL_GROUP = "radar_control"
+
+_draining = False
+
+
+def is_draining():
+    return _draining
+
+
+async def drain():
+    """进入排空模式并等待缓冲数据写出"""
+    global _draining
+    if _draining:
+        return
+    _draining = True
+    logger.warning("开始排空：停止接受新连接并通知客户端重连")
+
+    from channels.layers import get_channel_layer
+    from .focus_log import focus_monitor, focus_writer
+    from .storage import get_storage
+
+    try:
+        await get_channel_layer().group_send(CONTROL_GROUP, {"type": "server_draining"})
+    except Exception as e:
+        logger.error(f"排空通知发送失败: {e}")
+
+    # 给消费者留出时间发送已缓冲的消息
+    await asyncio.sleep(settings.RADAR_DRAIN_GRACE_SECONDS)
+
+    from .db import db_sync_to_async
+    # 结束所有未完成的专注区间并写出
+    focus_writer.record(focus_monitor.close_all())
+    await db_sync_to_async(focus_writer.flush)()
+    await db_sync_to_async(get_storage().close)()
+    logger.warning("排空完成")
+
+
+def install_drain_hooks():
+    """
+    在 daphne（Twisted 反应器）下接管 SIGTERM。
+    其他运行方式（manage.py、测试等）不做任何事。
+    """
+    if 'twisted.internet.reactor' not in sys.modules:
+        return
+    from twisted.internet import reactor
+
+    def stop(_=None):
+        if reactor.running:
+            reactor.stop()
+
+    def on_sigterm(signum, frame):
+        if _draining:
+            # 再次收到信号时立即停止
+            reactor.callFromThread(stop)
+            return
+        reactor.callFromThread(start_drain)
+
+    def finished(task):
+        if task.cancelled() or task.exception():
+            logger.error("排空超时或出错，直接停止")
+        stop()
+
+    def start_drain():
+        task = asyncio.ensure_future(
+            asyncio.wait_for(drain(), timeout=settings.RADAR_DRAIN_TIMEOUT)
+        )
+        task.add_done_callback(finished)
+
+    # 反应器启动时会安装自己的信号处理，必须在其之后覆盖
+    reactor.callWhenRunning(signal.signal, signal.SIGTERM, on_sigterm)
+
+
+def schedule_startup():
+    """
+    在 daphne 的反应器启动后再预热并启动信号质量检查，而不是在导入 ASGI 模块时，
+    这样只导入模块的进程（启动基准测试、管理命令等）不会连接数据库。
+    断流检查不依赖浏览器连接，没有打开面板时也能及时标记失联的传感器。
+    """
+    if 'twisted.internet.reactor' not in sys.modules:
+        return
+    from twisted.internet import reactor
+    reactor.callWhenRunning(warm_up)
+    # 启动回调执行时 asyncio 事件循环尚未进入运行状态，推迟到下一轮再创建任务
+    reactor.callWhenRunning(reactor.callLater, 0, start_quality_watchdog)
+
+
+def start_quality_watchdog():
+    from channels.layers import get_channel_layer
+    from .consumers import ensure_quality_watchdog
+    ensure_quality_watchdog(get_channel_layer())
+
+
+def warm_up():
+    """
+    启动后在数据库线程池中预热：建立持久连接、加载桥接器令牌和存储后端缓存，
+    避免部署后的第一批请求同时打到数据库。
+    """
+    from .bridge_auth import preload_tokens
+    from .db import get_db_executor
+    from .storage import get_storage
+
+    def open_connection():
+        try:
+            connection.ensure_connection()
+        except Exception as e:
+            logger.error(f"预热数据库连接失败: {e}")
+
+    def load_caches():
+        for task in (preload_tokens, get_storage().warm):
+            try:
+                task()
+            except Exception as e:
+                logger.error(f"缓存预热失败: {e}")
+
+    executor = get_db_executor()
+    executor.submit(load_caches)
+    for _ in range(settings.RADAR_DB_EXECUTOR_WORKERS - 1):
+        executor.submit(open_connection)
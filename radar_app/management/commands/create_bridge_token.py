@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from radar_app.bridge_auth import generate_token
+from radar_app.models import BridgeToken
+
+
+class Command(BaseCommand):
+    help = '为桥接器创建接入令牌（明文只显示一次）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='桥接器名称')
+        parser.add_argument('--rotate', action='store_true', help='已存在时重新生成令牌')
+
+    def handle(self, *args, name, rotate, **options):
+        token, digest = generate_token()
+        existing = BridgeToken.objects.filter(name=name).first()
+        if existing and not rotate:
+            raise CommandError(f"桥接器 {name} 已存在，使用 --rotate 重新生成令牌")
+        if existing:
+            existing.token_hash = digest
+            existing.is_active = True
+            existing.save()
+        else:
+            BridgeToken.objects.create(name=name, token_hash=digest)
+        self.stdout.write(token)
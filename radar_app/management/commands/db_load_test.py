@@ -0,0 +1,73 @@
+import asyncio
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from radar_app.consumers import RadarConsumer
+
+
+class Command(BaseCommand):
+    help = '模拟大量 WebSocket 消费者的数据库查询，观察连接数和延迟是否随连接数增长'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', default='10,100,500', help='逗号分隔的并发消费者数量')
+        parser.add_argument('--duration', type=float, default=5.0, help='每轮持续秒数')
+        parser.add_argument('--interval', type=float, default=0.5, help='每个消费者的查询间隔（与监测循环一致）')
+
+    def handle(self, *args, clients, duration, interval, **options):
+        opened = []
+        lock = threading.Lock()
+
+        def on_connect(sender, connection, **kwargs):
+            with lock:
+                opened.append(threading.get_ident())
+
+        connection_created.connect(on_connect, weak=False)
+        try:
+            self.stdout.write(f"{'消费者':>6} {'查询数':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'新建连接':>8} {'连接线程':>8} {'活动连接':>8}")
+            for count in [int(c) for c in clients.split(',') if c]:
+                opened.clear()
+                latencies = asyncio.run(self._run_level(count, duration, interval))
+                latencies.sort()
+                self.stdout.write(
+                    f"{count:>6} {len(latencies):>8} "
+                    f"{self._percentile(latencies, 50):>8.1f} {self._percentile(latencies, 95):>8.1f} "
+                    f"{self._percentile(latencies, 99):>8.1f} {len(opened):>8} "
+                    f"{len(set(opened)):>8} {self._server_connections():>8}"
+                )
+        finally:
+            connection_created.disconnect(on_connect)
+
+    async def _run_level(self, count, duration, interval):
+        latencies = []
+        deadline = time.monotonic() + duration
+
+        async def client():
+            consumer = RadarConsumer()
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                await consumer._get_recent_data(1)
+                latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(interval)
+
+        await asyncio.gather(*(client() for _ in range(count)))
+        return latencies
+
+    def _percentile(self, values, pct):
+        if not values:
+            return 0.0
+        if len(values) == 1:
+            return values[0]
+        return statistics.quantiles(values, n=100)[pct - 1]
+
+    def _server_connections(self):
+        """PostgreSQL 上当前数据库的连接数，其他数据库显示 -"""
+        if connection.vendor != 'postgresql':
+            return '-'
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()')
+            return cursor.fetchone()[0]
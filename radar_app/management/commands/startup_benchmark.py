@@ -0,0 +1,110 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# 名称 -> (导入的模块, 额外环境变量)
+TARGETS = {
+    'asgi_full': ('radar_monitoring.asgi', {'RADAR_PROFILE': 'full'}),
+    'asgi_ingest': ('radar_monitoring.asgi', {'RADAR_PROFILE': 'ingest'}),
+    'bridge': ('local_bridge_standalone', {}),
+}
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'startup.json'
+
+
+class Command(BaseCommand):
+    help = '在全新子进程中测量 ASGI 应用和桥接器的冷启动时间，并与基线比较'
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='*', help=f"要测量的目标（{', '.join(TARGETS)}），默认全部")
+        parser.add_argument('--runs', type=int, default=5, help='每个目标的运行次数')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='基线文件路径')
+        parser.add_argument('--save', action='store_true', help='把本次结果写入基线文件')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='允许比基线慢的比例')
+        parser.add_argument('--importtime', type=int, default=0, metavar='N', help='显示累计导入耗时最高的 N 个模块')
+
+    def handle(self, *args, targets, runs, baseline, save, tolerance, importtime, **options):
+        targets = targets or list(TARGETS)
+        unknown = set(targets) - set(TARGETS)
+        if unknown:
+            raise CommandError(f"未知目标: {', '.join(sorted(unknown))}")
+        results = {}
+        for name in targets:
+            module, env = TARGETS[name]
+            samples = [self._run_once(module, env) for _ in range(runs)]
+            results[name] = {
+                'median_ms': round(statistics.median(samples) * 1000, 1),
+                'min_ms': round(min(samples) * 1000, 1),
+            }
+            self.stdout.write(
+                f"{name:<12} 中位数 {results[name]['median_ms']:>8.1f} ms  最小 {results[name]['min_ms']:>8.1f} ms"
+            )
+            if importtime:
+                for cumulative, mod in self._import_profile(module, env)[:importtime]:
+                    self.stdout.write(f"    {cumulative / 1000:>8.1f} ms  {mod}")
+
+        baseline_path = Path(baseline)
+        if save:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+            self.stdout.write(f"基线已保存: {baseline_path}")
+            return
+
+        if not baseline_path.exists():
+            # 没有基线时无法判断回退，以非零状态退出，避免被当作通过
+            raise CommandError(f"基线文件不存在: {baseline_path}，请先在目标环境中使用 --save 生成")
+        reference = json.loads(baseline_path.read_text(encoding='utf-8'))
+        regressions = []
+        for name, result in results.items():
+            if name not in reference:
+                continue
+            limit = reference[name]['median_ms'] * (1 + tolerance)
+            if result['median_ms'] > limit:
+                regressions.append(f"{name}: {result['median_ms']} ms > {limit:.1f} ms")
+        if regressions:
+            raise CommandError('启动时间回退: ' + '; '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('启动时间未超过基线'))
+
+    def _env(self, env):
+        merged = dict(os.environ, **env)
+        merged['DJANGO_SETTINGS_MODULE'] = 'radar_monitoring.settings'
+        merged.pop('PYTHONDONTWRITEBYTECODE', None)
+        return merged
+
+    def _run_once(self, module, env):
+        """整个子进程的墙钟时间，包含解释器启动"""
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, '-c', f'import {module}'],
+            cwd=settings.BASE_DIR, env=self._env(env),
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        elapsed = time.perf_counter() - start
+        if proc.returncode != 0:
+            raise CommandError(f"导入 {module} 失败:\n{proc.stderr.strip()}")
+        return elapsed
+
+    def _import_profile(self, module, env):
+        """解析 -X importtime 输出，按累计耗时（微秒）降序"""
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=settings.BASE_DIR, env=self._env(env),
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        rows = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            parts = line[len('import time:'):].split('|')
+            if len(parts) != 3 or not parts[1].strip().isdigit():
+                continue
+            rows.append((int(parts[1]), parts[2].rstrip()))
+        rows.sort(reverse=True)
+        return rows
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radar_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='radardata',
+            index=models.Index(fields=['timestamp', 'id'], name='radardata_ts_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='radardata',
+            index=models.Index(fields=['sensor', 'timestamp'], name='radardata_sensor_ts_idx'),
+        ),
+    ]
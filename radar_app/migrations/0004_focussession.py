@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radar_app', '0003_bridgetoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FocusSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sensor_name', models.CharField(blank=True, max_length=100)),
+                ('state', models.CharField(choices=[('focused', '专注'), ('distracted', '分散')], max_length=16)),
+                ('focus_value', models.IntegerField(blank=True, null=True)),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField()),
+                ('sample_count', models.IntegerField(default=0)),
+                ('window_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [
+                    models.Index(fields=['sensor_name', 'started_at'], name='focussession_sensor_idx'),
+                    models.Index(fields=['ended_at'], name='focussession_ended_idx'),
+                ],
+            },
+        ),
+    ]
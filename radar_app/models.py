@@ -12,3 +12,41 @@ class RadarData(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # 后台按时间范围过滤与键集翻页
+            models.Index(fields=['timestamp', 'id'], name='radardata_ts_id_idx'),
+            # 按传感器过滤后再按时间排序
+            models.Index(fields=['sensor', 'timestamp'], name='radardata_sensor_ts_idx'),
+        ]
+class BridgeToken(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    # 只保存令牌的 SHA-256 摘要，明文仅在创建时显示一次
+    token_hash = models.CharField(max_length=64, unique=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    def __str__(self):
+        return self.name
+class FocusSession(models.Model):
+    """专注/分散状态区间，只在状态切换时写入一行"""
+    STATE_FOCUSED = 'focused'
+    STATE_DISTRACTED = 'distracted'
+    STATE_CHOICES = [
+        (STATE_FOCUSED, '专注'),
+        (STATE_DISTRACTED, '分散'),
+    ]
+    # 直接保存传感器名称，写入时无需查询传感器表
+    sensor_name = models.CharField(max_length=100, blank=True)
+    state = models.CharField(max_length=16, choices=STATE_CHOICES)
+    focus_value = models.IntegerField(null=True, blank=True)
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField()
+    sample_count = models.IntegerField(default=0)
+    window_count = models.IntegerField(default=0)
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['sensor_name', 'started_at'], name='focussession_sensor_idx'),
+            models.Index(fields=['ended_at'], name='focussession_ended_idx'),
+        ]
+    def __str__(self):
+        return f"{self.sensor_name} {self.get_state_display()} {self.started_at:%H:%M:%S}"
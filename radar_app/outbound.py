@@ -0,0 +1,126 @@
+"""
+每个 WebSocket 连接的有界发送队列。
+
+频道层只负责把消息交给消费者，消费者立即放入本地队列返回，
+由独立任务取出发送。daphne 的 send 只是把数据追加到 Twisted 连接的写缓冲区，
+不会等待客户端，所以发送任务在写缓冲区积压超过 max_backlog_bytes 时暂停取出，
+客户端网络慢时消息留在本队列中。队列满时按策略处理：
+
+- drop_oldest：丢弃最旧的消息
+- coalesce：同一传感器只保留最新值，新传感器挤掉最旧的传感器
+- disconnect：断开跟不上的客户端
+"""
+import asyncio
+import functools
+from collections import OrderedDict, deque
+
+from .throttling import StatsCounter
+
+POLICIES = ('drop_oldest', 'coalesce', 'disconnect')
+
+# 写缓冲区积压时重新检查的间隔（秒）
+BACKLOG_POLL_INTERVAL = 0.05
+# scope 中保存读取写缓冲区积压字节数的函数
+BACKLOG_SCOPE_KEY = 'radar.transport_backlog'
+
+outbound_stats = StatsCounter()
+
+
+def transport_pending_bytes(transport):
+    """Twisted 传输层尚未写入套接字的字节数，TLS 等包装层逐层累加"""
+    pending = 0
+    seen = set()
+    while transport is not None and id(transport) not in seen:
+        seen.add(id(transport))
+        data_buffer = getattr(transport, 'dataBuffer', None)
+        if data_buffer is not None:
+            pending += len(data_buffer) - getattr(transport, 'offset', 0)
+        pending += getattr(transport, '_tempDataLen', 0)
+        transport = getattr(transport, 'transport', None)
+    return pending
+
+
+def daphne_protocol(send):
+    """
+    daphne 传给应用的 send 是 partial(Server.handle_reply, protocol)，
+    在服务器的连接表中确认后返回对应的协议对象；其他服务器返回 None
+    """
+    if not isinstance(send, functools.partial) or not send.args:
+        return None
+    server = getattr(send.func, '__self__', None)
+    connections = getattr(server, 'connections', None)
+    protocol = send.args[0]
+    if connections is None or protocol not in connections:
+        return None
+    return protocol
+
+
+class TransportBacklogMiddleware:
+    """
+    最外层 ASGI 包装：在 daphne 下把读取该连接写缓冲区积压的函数放入 scope，
+    内层的会话中间件会替换 send，只有这里还能拿到 daphne 原始的 send
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def __call__(self, scope, receive, send):
+        protocol = daphne_protocol(send)
+        if protocol is not None:
+            scope = dict(scope)
+            scope[BACKLOG_SCOPE_KEY] = lambda: transport_pending_bytes(getattr(protocol, 'transport', None))
+        return await self.inner(scope, receive, send)
+
+
+class OutboundQueue:
+
+    def __init__(self, policy='coalesce', max_size=200, max_backlog_bytes=65536, backlog=None):
+        if policy not in POLICIES:
+            raise ValueError(f"未知的发送队列策略: {policy}")
+        self.policy = policy
+        self.max_size = max_size
+        self.max_backlog_bytes = max_backlog_bytes
+        # 返回连接写缓冲区积压字节数的函数，为 None 时不检查
+        self.backlog = backlog
+        self._items = OrderedDict() if policy == 'coalesce' else deque()
+        self._ready = asyncio.Event()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, key, message):
+        """放入消息；disconnect 策略下队列已满时返回 False"""
+        items = self._items
+        if self.policy == 'coalesce':
+            if key in items:
+                # 原位替换，避免高频传感器一直排到队尾
+                items[key] = message
+                outbound_stats.incr('coalesced')
+                return True
+            if len(items) >= self.max_size:
+                items.popitem(last=False)
+                outbound_stats.incr('dropped')
+            items[key] = message
+        else:
+            if len(items) >= self.max_size:
+                if self.policy == 'disconnect':
+                    return False
+                items.popleft()
+                outbound_stats.incr('dropped')
+            items.append(message)
+        outbound_stats.incr('enqueued')
+        self._ready.set()
+        return True
+
+    async def get(self):
+        """等待写缓冲区有空间、队列中有消息后取出一条"""
+        if self.backlog is not None and self.backlog() > self.max_backlog_bytes:
+            outbound_stats.incr('backpressure_waits')
+            while self.backlog() > self.max_backlog_bytes:
+                await asyncio.sleep(BACKLOG_POLL_INTERVAL)
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        if self.policy == 'coalesce':
+            return self._items.popitem(last=False)[1]
+        return self._items.popleft()
@@ -0,0 +1,152 @@
+"""
+流式信号质量检测。
+
+每个传感器只保存少量增量统计（EWMA 均值/方差、采样间隔、连续相同值），
+每个采样 O(1) 更新，不查询数据库。质量状态变化时才产生事件：
+
+- out_of_range：数值超出允许范围
+- stuck：长时间保持同一数值（专注值除外，专注时数值本来就保持不变）
+- dropout：超过预期间隔未收到数据（由定时检查发现）
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+
+from .focus_log import FOCUS_VALUES
+
+DEFAULTS = {
+    # 桥接器上传的是帧中的一个原始字节
+    'value_min': 0,
+    'value_max': 255,
+    # EWMA 平滑系数
+    'alpha': 0.1,
+    # 同一数值持续超过该秒数且不少于 stuck_min_samples 个采样视为卡死
+    'stuck_seconds': 600,
+    'stuck_min_samples': 60,
+    # 这些数值持续不变是正常状态，不参与卡死判定
+    'stuck_exempt_values': FOCUS_VALUES,
+    # 断流判定：超过 gap_seconds 与 gap_factor 倍平均间隔中的较大值
+    'gap_seconds': 5,
+    'gap_factor': 5,
+}
+
+
+class SensorQuality:
+    __slots__ = ('mean', 'var', 'interval', 'last_ts', 'run_value', 'run_start', 'run_count',
+                 'count', 'reasons')
+
+    def __init__(self):
+        self.mean = 0.0
+        self.var = 0.0
+        self.interval = None
+        self.last_ts = None
+        self.run_value = None
+        self.run_start = None
+        self.run_count = 0
+        self.count = 0
+        self.reasons = frozenset()
+
+    def update(self, value, now, alpha, track_interval=True):
+        if self.count == 0:
+            self.mean = float(value)
+        else:
+            # 增量 EWMA 方差
+            diff = value - self.mean
+            incr = alpha * diff
+            self.mean += incr
+            self.var = (1 - alpha) * (self.var + diff * incr)
+            if track_interval:
+                gap = now - self.last_ts
+                self.interval = gap if self.interval is None else self.interval + alpha * (gap - self.interval)
+        self.count += 1
+        self.last_ts = now
+
+        if value == self.run_value:
+            self.run_count += 1
+        else:
+            self.run_value = value
+            self.run_start = now
+            self.run_count = 1
+
+
+class SignalQualityMonitor:
+    def __init__(self, config=None):
+        self._config = config
+        self._sensors = {}
+        self._lock = threading.Lock()
+
+    @property
+    def config(self):
+        if self._config is None:
+            self._config = {**DEFAULTS, **getattr(settings, 'RADAR_SIGNAL_QUALITY', {})}
+        return self._config
+
+    def observe(self, sensor_id, value, now=None):
+        """处理一个采样，质量状态变化时返回事件，否则返回 None"""
+        config = self.config
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._sensors.get(sensor_id)
+            if state is None:
+                state = self._sensors[sensor_id] = SensorQuality()
+            # 断流后恢复的第一个间隔不计入平均间隔
+            state.update(value, now, config['alpha'], track_interval='dropout' not in state.reasons)
+
+            reasons = set()
+            if not config['value_min'] <= value <= config['value_max']:
+                reasons.add('out_of_range')
+            if (value not in config['stuck_exempt_values']
+                    and state.run_count >= config['stuck_min_samples']
+                    and now - state.run_start >= config['stuck_seconds']):
+                reasons.add('stuck')
+            return self._transition(sensor_id, state, frozenset(reasons))
+
+    def check_gaps(self, now=None):
+        """检查所有传感器的断流情况，返回新产生的事件列表"""
+        config = self.config
+        now = time.monotonic() if now is None else now
+        events = []
+        with self._lock:
+            for sensor_id, state in self._sensors.items():
+                if 'dropout' in state.reasons or state.last_ts is None:
+                    continue
+                limit = config['gap_seconds']
+                if state.interval:
+                    limit = max(limit, config['gap_factor'] * state.interval)
+                if now - state.last_ts > limit:
+                    event = self._transition(sensor_id, state, state.reasons | {'dropout'})
+                    if event:
+                        events.append(event)
+        return events
+
+    def snapshot(self):
+        with self._lock:
+            return {sensor_id: self._describe(state) for sensor_id, state in self._sensors.items()}
+
+    def _transition(self, sensor_id, state, reasons):
+        if reasons == state.reasons:
+            return None
+        state.reasons = reasons
+        return {
+            'type': 'signal_quality',
+            'sensor_id': sensor_id,
+            **self._describe(state),
+        }
+
+    def _describe(self, state):
+        return {
+            'status': 'bad' if state.reasons else 'ok',
+            'reasons': sorted(state.reasons),
+            'mean': round(state.mean, 3),
+            'std': round(math.sqrt(state.var), 3),
+            'interval': round(state.interval, 3) if state.interval else None,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._sensors.clear()
+
+
+quality_monitor = SignalQualityMonitor()
@@ -0,0 +1,23 @@
+"""
+雷达数据存储后端。
+
+接入和历史查询都通过 get_storage() 取得的后端完成，
+由 settings.RADAR_STORAGE_BACKEND 选择：
+
+- radar_app.storage.orm.OrmStorage：默认，写入 RadarData 表
+- radar_app.storage.segments.SegmentStorage：本地按传感器分块的列式文件，内存映射读取
+"""
+import functools
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .base import BaseStorage
+
+
+@functools.lru_cache(maxsize=None)
+def get_storage():
+    return import_string(settings.RADAR_STORAGE_BACKEND)()
+
+
+__all__ = ['BaseStorage', 'get_storage']
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from ..models import RadarSensor
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def to_micros(value):
+    """带时区的 datetime 转为 UTC 微秒"""
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(micros):
+    return EPOCH + timedelta(microseconds=micros)
+
+
+class BaseStorage:
+    """存储后端接口，时间戳统一使用 UTC 微秒整数"""
+
+    def append(self, sensor_id, value):
+        """以当前时间写入一个采样"""
+        raise NotImplementedError
+
+    def recent_values(self, seconds, limit=50):
+        """所有传感器最近 seconds 秒内的数值，新数据在前，最多 limit 个"""
+        raise NotImplementedError
+
+    def read_range(self, sensor_id, start_us, end_us, limit=None):
+        """
+        读取 [start_us, end_us] 内最早的 limit 个采样（None 为不限），按时间升序。
+        返回 (timestamps, values) 分块列表，每块是两个等长序列；
+        分块后端可直接返回内存映射视图，避免复制。
+        """
+        raise NotImplementedError
+
+    def warm(self):
+        """启动预热，默认不做任何事"""
+
+    def close(self):
+        """写出缓冲数据并释放资源，默认不做任何事"""
+
+    def get_sensor(self, sensor_id):
+        sensor, _ = RadarSensor.objects.get_or_create(
+            name=sensor_id,
+            defaults={"display_name": f"雷达_{sensor_id[-4:]}"}
+        )
+        return sensor
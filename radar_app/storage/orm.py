@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from ..models import RadarData
+from .base import BaseStorage, from_micros, to_micros
+
+
+class OrmStorage(BaseStorage):
+    """通过 Django ORM 读写 RadarData 表"""
+
+    def append(self, sensor_id, value):
+        RadarData.objects.create(sensor=self.get_sensor(sensor_id), value=value)
+
+    def warm(self):
+        # 预先执行一次监测循环的查询，载入索引页
+        self.recent_values(60)
+
+    def recent_values(self, seconds, limit=50):
+        time_ago = timezone.now() - timedelta(seconds=seconds)
+        return list(RadarData.objects.filter(
+            timestamp__gte=time_ago
+        ).values_list('value', flat=True)[:limit])
+
+    def read_range(self, sensor_id, start_us, end_us, limit=None):
+        rows = RadarData.objects.filter(
+            sensor__name=sensor_id,
+            timestamp__gte=from_micros(start_us),
+            timestamp__lte=from_micros(end_us),
+        ).order_by('timestamp', 'id').values_list('timestamp', 'value')
+        if limit is not None:
+            rows = rows[:limit]
+        timestamps, values = [], []
+        for timestamp, value in rows.iterator():
+            timestamps.append(to_micros(timestamp))
+            values.append(value)
+        return [(timestamps, values)] if timestamps else []
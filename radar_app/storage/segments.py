@@ -0,0 +1,207 @@
+"""
+本地分块列式存储。
+
+目录结构：<root>/<传感器>/<块起始微秒>.ts 与 .val，
+每个块覆盖 block_seconds 秒，时间戳列为 int64 微秒，数值列为 int32，
+均为本机字节序的定长数组，只追加写入。
+
+读取时对块文件做内存映射，直接在映射视图上二分查找时间范围，
+返回的切片不复制数据。
+"""
+import bisect
+import hashlib
+import heapq
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+
+from .base import BaseStorage
+
+TS_FORMAT = '=q'
+VALUE_FORMAT = '=i'
+TS_SIZE = struct.calcsize(TS_FORMAT)
+VALUE_SIZE = struct.calcsize(VALUE_FORMAT)
+VALUE_MIN = -2 ** 31
+VALUE_MAX = 2 ** 31 - 1
+
+
+def sensor_dirname(sensor_id):
+    """传感器名称转为目录名，含特殊字符时使用摘要"""
+    if re.fullmatch(r'[0-9A-Za-z_.-]{1,80}', sensor_id) and sensor_id not in ('.', '..'):
+        return sensor_id
+    return 'h_' + hashlib.sha1(sensor_id.encode('utf-8')).hexdigest()
+
+
+class _BlockWriter:
+    __slots__ = ('block_start', 'ts_file', 'value_file')
+
+    def __init__(self, directory, block_start):
+        self.block_start = block_start
+        self.ts_file = open(directory / f'{block_start}.ts', 'ab')
+        self.value_file = open(directory / f'{block_start}.val', 'ab')
+
+    def write(self, ts_record, value_record):
+        """写入已打包的一对记录；中途失败时截断两列，保持行对齐"""
+        ts_end = self.ts_file.tell()
+        value_end = self.value_file.tell()
+        try:
+            self.ts_file.write(ts_record)
+            self.value_file.write(value_record)
+            self.ts_file.flush()
+            self.value_file.flush()
+        except Exception:
+            for f, end in ((self.ts_file, ts_end), (self.value_file, value_end)):
+                try:
+                    f.truncate(end)
+                except Exception:
+                    pass
+            raise
+
+    def close(self):
+        for f in (self.ts_file, self.value_file):
+            os.fsync(f.fileno())
+            f.close()
+
+
+class SegmentStorage(BaseStorage):
+    """按传感器、按时间分块的追加写存储，单进程写入"""
+
+    def __init__(self, root=None, block_seconds=None, max_mapped=256):
+        self.root = Path(root or settings.RADAR_SEGMENT_DIR)
+        self.block_us = int((block_seconds or settings.RADAR_SEGMENT_BLOCK_SECONDS) * 1_000_000)
+        self.max_mapped = max_mapped
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writers = {}
+        self._last_ts = {}
+        self._known_sensors = set()
+        # 路径 -> (映射长度, mmap)，最近使用的在末尾
+        self._maps = OrderedDict()
+
+    # 写入
+
+    def append(self, sensor_id, value):
+        if sensor_id not in self._known_sensors:
+            # 传感器元数据仍登记在数据库，供后台和多雷达面板使用
+            self.get_sensor(sensor_id)
+            self._known_sensors.add(sensor_id)
+
+        # 与 IntegerField 一样转为整数，并在写入任何一列之前校验，避免两列错位
+        value = int(value)
+        if not VALUE_MIN <= value <= VALUE_MAX:
+            raise ValueError(f"数值超出 int32 范围: {value}")
+        value_record = struct.pack(VALUE_FORMAT, value)
+
+        ts = time.time_ns() // 1000
+        with self._lock:
+            # 同一传感器内保证时间戳严格递增，二分查找和 after 游标都依赖这一点
+            ts = max(ts, self._last_ts.get(sensor_id, -1) + 1)
+            self._writer(sensor_id, ts).write(struct.pack(TS_FORMAT, ts), value_record)
+            self._last_ts[sensor_id] = ts
+
+    def _writer(self, sensor_id, ts):
+        block_start = ts - ts % self.block_us
+        writer = self._writers.get(sensor_id)
+        if writer is None or writer.block_start != block_start:
+            if writer is not None:
+                writer.close()
+            directory = self.root / sensor_dirname(sensor_id)
+            directory.mkdir(exist_ok=True)
+            writer = self._writers[sensor_id] = _BlockWriter(directory, block_start)
+        return writer
+
+    def warm(self):
+        """登记已知传感器，并映射最近的块"""
+        from ..models import RadarSensor
+        self._known_sensors.update(RadarSensor.objects.values_list('name', flat=True))
+        self.recent_values(self.block_us / 1_000_000)
+
+    def close(self):
+        with self._lock:
+            for writer in self._writers.values():
+                writer.close()
+            self._writers.clear()
+            self._maps.clear()
+
+    # 读取
+
+    def read_range(self, sensor_id, start_us, end_us, limit=None):
+        directory = self.root / sensor_dirname(sensor_id)
+        chunks = []
+        remaining = limit
+        for block_start in self._block_starts(directory):
+            if block_start + self.block_us <= start_us or block_start > end_us:
+                continue
+            timestamps, values = self._read_block(directory, block_start)
+            lo = bisect.bisect_left(timestamps, start_us)
+            hi = bisect.bisect_right(timestamps, end_us)
+            if remaining is not None:
+                hi = min(hi, lo + remaining)
+            if hi > lo:
+                chunks.append((timestamps[lo:hi], values[lo:hi]))
+                if remaining is not None:
+                    remaining -= hi - lo
+                    if remaining <= 0:
+                        break
+        return chunks
+
+    def recent_values(self, seconds, limit=50):
+        since = time.time_ns() // 1000 - int(seconds * 1_000_000)
+        newest = []
+        try:
+            sensors = [entry.name for entry in os.scandir(self.root) if entry.is_dir()]
+        except FileNotFoundError:
+            return []
+        for name in sensors:
+            directory = self.root / name
+            blocks = [b for b in self._block_starts(directory) if b + self.block_us > since]
+            for block_start in blocks:
+                timestamps, values = self._read_block(directory, block_start)
+                lo = bisect.bisect_left(timestamps, since)
+                # 每个传感器最多取 limit 个最新值
+                lo = max(lo, len(timestamps) - limit)
+                newest.extend(zip(timestamps[lo:], values[lo:]))
+        return [value for _, value in heapq.nlargest(limit, newest)]
+
+    def _block_starts(self, directory):
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[:-3]) for name in names if name.endswith('.ts'))
+
+    def _read_block(self, directory, block_start):
+        timestamps = self._map(directory / f'{block_start}.ts', TS_FORMAT)
+        values = self._map(directory / f'{block_start}.val', VALUE_FORMAT)
+        # 两列写入之间可能中断，以较短的一列为准
+        count = min(len(timestamps), len(values))
+        return timestamps[:count], values[:count]
+
+    def _map(self, path, fmt):
+        size = path.stat().st_size if path.exists() else 0
+        itemsize = struct.calcsize(fmt)
+        size -= size % itemsize
+        if size == 0:
+            return memoryview(b'').cast(fmt[-1])
+
+        key = str(path)
+        with self._lock:
+            cached = self._maps.get(key)
+            if cached is None or cached[0] != size:
+                # 活动块在增长，大小变化时重新映射；旧映射仍被视图引用时会在释放后自动回收
+                with open(path, 'rb') as f:
+                    mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+                self._maps[key] = (size, mapped)
+                while len(self._maps) > self.max_mapped:
+                    self._maps.popitem(last=False)
+            else:
+                mapped = cached[1]
+            self._maps.move_to_end(key)
+        return memoryview(mapped).cast(fmt[-1])
@@ -1,3 +1,387 @@
-from django.test import TestCase
+import asyncio
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
 
-# Create your tests here.
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from .focus_log import FocusMonitor
+from .models import FocusSession
+from .outbound import OutboundQueue, outbound_stats, transport_pending_bytes
+from .storage.orm import OrmStorage
+from .storage.segments import SegmentStorage
+from .signal_quality import DEFAULTS, SignalQualityMonitor
+from .throttling import RateLimiter, TokenBucket
+
+T0 = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+class FocusMonitorTests(SimpleTestCase):
+
+    def feed(self, monitor, sensor_id, values, start, step=0.5):
+        finished = []
+        for i, value in enumerate(values):
+            finished += monitor.observe(sensor_id, value, now=at(start + i * step))
+        return finished
+
+    def test_consecutive_windows_merge_into_one_interval(self):
+        monitor = FocusMonitor(window_seconds=5)
+        finished = self.feed(monitor, 'A', [16] * 40, start=0)
+        self.assertEqual(finished, [])
+
+        sessions = monitor.close_all()
+        self.assertEqual(len(sessions), 1)
+        session = sessions[0]
+        self.assertEqual(session.sensor_name, 'A')
+        self.assertEqual(session.state, FocusSession.STATE_FOCUSED)
+        self.assertEqual(session.focus_value, 16)
+        self.assertEqual(session.sample_count, 40)
+        self.assertEqual(session.started_at, at(0))
+        self.assertEqual(session.ended_at, at(19.5))
+
+    def test_transition_closes_previous_interval(self):
+        monitor = FocusMonitor(window_seconds=5)
+        self.feed(monitor, 'A', [15] * 10, start=0)
+        finished = self.feed(monitor, 'A', [15, 30] * 5, start=5)
+        finished += self.feed(monitor, 'A', [15], start=10)
+
+        self.assertEqual(len(finished), 1)
+        self.assertEqual(finished[0].state, FocusSession.STATE_FOCUSED)
+        self.assertEqual(finished[0].ended_at, at(4.5))
+        current = monitor.close_all()[0]
+        self.assertEqual(current.state, FocusSession.STATE_DISTRACTED)
+        self.assertIsNone(current.focus_value)
+
+    def test_samples_are_attributed_to_their_sensor(self):
+        monitor = FocusMonitor(window_seconds=5)
+        for i in range(12):
+            monitor.observe('A', 17, now=at(i * 0.5))
+            monitor.observe('B', 40 + i, now=at(i * 0.5))
+
+        sessions = {s.sensor_name: s for s in monitor.close_all()}
+        self.assertEqual(sessions['A'].state, FocusSession.STATE_FOCUSED)
+        self.assertEqual(sessions['A'].sample_count, 12)
+        self.assertEqual(sessions['B'].state, FocusSession.STATE_DISTRACTED)
+        self.assertEqual(sessions['B'].sample_count, 12)
+
+    def test_idle_sensor_interval_is_closed(self):
+        monitor = FocusMonitor(window_seconds=5, idle_seconds=60)
+        self.feed(monitor, 'A', [16] * 4, start=0)
+
+        self.assertEqual(monitor.close_idle(now=at(30)), [])
+        finished = monitor.close_idle(now=at(70))
+        self.assertEqual(len(finished), 1)
+        self.assertEqual(finished[0].ended_at, at(1.5))
+
+        # 断流后恢复的数据开始新的区间
+        finished = self.feed(monitor, 'A', [16] * 12, start=100)
+        self.assertEqual(finished, [])
+        self.assertEqual(monitor.close_all()[0].started_at, at(100))
+
+
+class SignalQualityMonitorTests(SimpleTestCase):
+
+    def setUp(self):
+        self.monitor = SignalQualityMonitor(config={
+            **DEFAULTS, 'stuck_seconds': 30, 'stuck_min_samples': 10,
+        })
+
+    def feed(self, values, start=0.0, step=0.5, sensor_id='A'):
+        events = []
+        for i, value in enumerate(values):
+            event = self.monitor.observe(sensor_id, value, now=start + i * step)
+            if event:
+                events.append(event)
+        return events
+
+    def test_normal_stream_produces_no_events(self):
+        self.assertEqual(self.feed([20, 35, 50, 41, 28] * 20), [])
+        self.assertEqual(self.monitor.check_gaps(now=50.5), [])
+        self.assertEqual(self.monitor.snapshot()['A']['status'], 'ok')
+
+    def test_out_of_range_and_recovery(self):
+        events = self.feed([40, 300, 41])
+        self.assertEqual([e['status'] for e in events], ['bad', 'ok'])
+        self.assertEqual(events[0]['reasons'], ['out_of_range'])
+        self.assertEqual(self.feed([255], start=2), [])
+
+    def test_constant_value_is_flagged_stuck(self):
+        events = self.feed([42] * 80)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['reasons'], ['stuck'])
+        self.assertEqual(events[0]['std'], 0)
+
+    def test_focus_values_are_not_stuck(self):
+        # 长时间专注时数值保持 15/16/17 不变，不能报告为卡死
+        for value in (15, 16, 17):
+            self.monitor.reset()
+            self.assertEqual(self.feed([value] * 200), [])
+
+    def test_gap_is_reported_once_and_cleared_by_next_sample(self):
+        self.feed([20, 30] * 10)
+        self.assertEqual(self.monitor.check_gaps(now=10.0), [])
+
+        events = self.monitor.check_gaps(now=20.0)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['reasons'], ['dropout'])
+        self.assertEqual(self.monitor.check_gaps(now=30.0), [])
+
+        events = self.feed([25], start=31)
+        self.assertEqual([e['status'] for e in events], ['ok'])
+        # 断流期间的间隔不计入平均采样间隔
+        self.assertEqual(self.monitor.snapshot()['A']['interval'], 0.5)
+
+
+def radar_message(sensor_id, value):
+    return {'type': 'radar_data', 'sensor_id': sensor_id, 'value': value}
+
+
+class OutboundQueueTests(SimpleTestCase):
+
+    def setUp(self):
+        outbound_stats.reset()
+
+    async def drain(self, queue):
+        return [await queue.get() for _ in range(len(queue))]
+
+    async def test_drop_oldest_keeps_newest_messages(self):
+        queue = OutboundQueue('drop_oldest', max_size=3)
+        for value in range(5):
+            self.assertTrue(queue.put('A', radar_message('A', value)))
+
+        self.assertEqual([m['value'] for m in await self.drain(queue)], [2, 3, 4])
+        self.assertEqual(outbound_stats.snapshot()['dropped'], 2)
+
+    async def test_coalesce_keeps_latest_value_per_sensor(self):
+        queue = OutboundQueue('coalesce', max_size=2)
+        queue.put('A', radar_message('A', 1))
+        queue.put('B', radar_message('B', 1))
+        queue.put('A', radar_message('A', 2))
+        self.assertEqual(len(queue), 2)
+
+        # 新传感器挤掉最早进入队列的传感器
+        queue.put('C', radar_message('C', 1))
+        messages = await self.drain(queue)
+        self.assertEqual([(m['sensor_id'], m['value']) for m in messages], [('B', 1), ('C', 1)])
+        stats = outbound_stats.snapshot()
+        self.assertEqual(stats['coalesced'], 1)
+        self.assertEqual(stats['dropped'], 1)
+
+    async def test_disconnect_rejects_when_full(self):
+        queue = OutboundQueue('disconnect', max_size=2)
+        self.assertTrue(queue.put('A', radar_message('A', 1)))
+        self.assertTrue(queue.put('A', radar_message('A', 2)))
+        self.assertFalse(queue.put('A', radar_message('A', 3)))
+        self.assertEqual([m['value'] for m in await self.drain(queue)], [1, 2])
+
+    async def test_transport_backlog_holds_messages_in_queue(self):
+        backlog = {'bytes': 100000}
+        queue = OutboundQueue('drop_oldest', max_size=3, max_backlog_bytes=65536,
+                              backlog=lambda: backlog['bytes'])
+        queue.put('A', radar_message('A', 0))
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0.1)
+        self.assertFalse(getter.done())
+
+        # 客户端读不动时后续消息留在队列里，超出上限按策略丢弃
+        for value in range(1, 5):
+            queue.put('A', radar_message('A', value))
+        self.assertEqual(outbound_stats.snapshot()['dropped'], 2)
+
+        backlog['bytes'] = 0
+        self.assertEqual((await asyncio.wait_for(getter, 1))['value'], 2)
+        self.assertEqual(outbound_stats.snapshot()['backpressure_waits'], 1)
+
+    async def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            OutboundQueue('block')
+
+
+class TransportPendingBytesTests(SimpleTestCase):
+
+    def test_counts_unwritten_and_wrapped_buffers(self):
+        class TCP:
+            dataBuffer = b'x' * 100
+            offset = 40
+            _tempDataLen = 25
+
+        class TLS:
+            _tempDataLen = 0
+            transport = TCP()
+
+        self.assertEqual(transport_pending_bytes(TCP()), 85)
+        self.assertEqual(transport_pending_bytes(TLS()), 85)
+        self.assertEqual(transport_pending_bytes(None), 0)
+
+
+class TokenBucketTests(SimpleTestCase):
+
+    def test_burst_then_refill(self):
+        bucket = TokenBucket(rate=2, capacity=3)
+        bucket.updated = 0.0
+        self.assertEqual([bucket.consume(0.0) for _ in range(4)], [True, True, True, False])
+        self.assertAlmostEqual(bucket.retry_after(), 0.5)
+
+        self.assertTrue(bucket.consume(0.5))
+        self.assertFalse(bucket.consume(0.5))
+        # 补充的令牌不超过容量
+        self.assertTrue(all(bucket.consume(100.0) for _ in range(3)))
+        self.assertFalse(bucket.consume(100.0))
+
+
+class RateLimiterTests(SimpleTestCase):
+
+    def test_keys_are_limited_independently(self):
+        limiter = RateLimiter(rate=1, burst=2)
+        self.assertEqual([limiter.allow('a', now=0.0)[0] for _ in range(3)], [True, True, False])
+        self.assertTrue(limiter.allow(('a', 'S1'), now=0.0)[0])
+
+        allowed, retry_after = limiter.allow('a', now=0.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 1.0)
+        self.assertTrue(limiter.allow('a', now=1.0)[0])
+
+    def test_new_keys_evict_least_recently_used(self):
+        limiter = RateLimiter(rate=1, burst=2, max_keys=3)
+        for _ in range(2):
+            limiter.allow('victim', now=0.0)
+        self.assertFalse(limiter.allow('victim', now=0.0)[0])
+
+        # 大量新 key 只淘汰最久未使用的桶，已耗尽的活跃桶不会被重置
+        for i in range(100):
+            limiter.allow(f'spoofed-{i}', now=0.0)
+            self.assertFalse(limiter.allow('victim', now=0.0)[0])
+        self.assertEqual(len(limiter), 3)
+
+
+class FocusSummaryViewTests(TestCase):
+
+    def test_durations_are_clipped_to_window(self):
+        now = timezone.now()
+        for started, ended in ((600, 30), (20, 10)):
+            FocusSession.objects.create(
+                sensor_name='A', state=FocusSession.STATE_FOCUSED, focus_value=16,
+                started_at=now - timedelta(minutes=started), ended_at=now - timedelta(minutes=ended),
+            )
+
+        summary = self.client.get('/radar/api/focus-summary/?hours=1').json()['summary']
+        focused = summary['A'][FocusSession.STATE_FOCUSED]
+        self.assertEqual(focused['sessions'], 2)
+        self.assertAlmostEqual(focused['seconds'], 40 * 60, delta=5)
+
+    def test_non_finite_hours_rejected(self):
+        for hours in ('nan', 'inf', 'abc'):
+            self.assertEqual(self.client.get(f'/radar/api/focus-summary/?hours={hours}').status_code, 400)
+
+
+class SegmentStorageTests(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.storage = SegmentStorage(root=self.root, block_seconds=1)
+        self.addCleanup(self.storage.close)
+        self.clock = 1_000_000_000_000_000_000
+        patcher = mock.patch('radar_app.storage.segments.time.time_ns', side_effect=self.tick)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tick(self):
+        self.clock += 300_000_000
+        return self.clock
+
+    def read_all(self, sensor_id='S1', start_us=0, end_us=2 ** 62, limit=None):
+        timestamps, values = [], []
+        for chunk_ts, chunk_values in self.storage.read_range(sensor_id, start_us, end_us, limit=limit):
+            timestamps += list(chunk_ts)
+            values += list(chunk_values)
+        return timestamps, values
+
+    def test_round_trip_across_blocks(self):
+        for value in range(10):
+            self.storage.append('S1', value)
+        timestamps, values = self.read_all()
+        self.assertEqual(values, list(range(10)))
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertGreater(len(self.storage._block_starts(self.storage.root / 'S1')), 1)
+
+        self.assertEqual(self.read_all(limit=4)[1], [0, 1, 2, 3])
+        self.assertEqual(self.read_all(start_us=timestamps[3], end_us=timestamps[6])[1], [3, 4, 5, 6])
+
+    def test_timestamps_strictly_increase_when_clock_stalls(self):
+        self.tick = lambda: self.clock
+        for value in range(3):
+            self.storage.append('S1', value)
+        timestamps, _ = self.read_all()
+        self.assertEqual(len(set(timestamps)), 3)
+
+    def test_invalid_value_does_not_misalign_columns(self):
+        self.storage.append('S1', 10)
+        for bad in ('15.5', 2 ** 31, 'abc'):
+            with self.assertRaises(ValueError):
+                self.storage.append('S1', bad)
+        # 与 IntegerField 相同，浮点数取整后写入
+        self.storage.append('S1', 15.5)
+        self.storage.append('S1', 20)
+
+        timestamps, values = self.read_all()
+        self.assertEqual(values, [10, 15, 20])
+        self.assertEqual(len(timestamps), len(set(timestamps)))
+        self.assertEqual(timestamps, sorted(timestamps))
+
+
+class RadarHistoryViewTests(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.storage = SegmentStorage(root=self.root)
+        self.addCleanup(self.storage.close)
+        patcher = mock.patch('radar_app.views.get_storage', return_value=self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, query):
+        response = self.client.get('/radar/api/history/?' + query)
+        if response.status_code != 200:
+            return response.status_code, None
+        return 200, json.loads(b''.join(response.streaming_content))
+
+    def test_after_cursor_pages_through_all_samples(self):
+        for value in range(25):
+            self.storage.append('S1', value)
+
+        values, after, pages = [], None, 0
+        while True:
+            _, data = self.get('sensor=S1&limit=10' + (f'&after={after}' if after else ''))
+            self.assertEqual(data['count'], len(data['values']))
+            values += data['values']
+            pages += 1
+            after = data['next_after']
+            if after is None:
+                break
+        self.assertEqual(values, list(range(25)))
+        self.assertEqual(pages, 3)
+
+    def test_invalid_parameters_return_400(self):
+        for query in ('', 'sensor=S1&seconds=nan', 'sensor=S1&seconds=inf',
+                      'sensor=S1&limit=x', 'sensor=S1&after=x'):
+            self.assertEqual(self.get(query)[0], 400, query)
+
+    def test_out_of_range_cursor_is_clamped(self):
+        self.storage.append('S1', 1)
+        status, data = self.get('sensor=S1&after=99999999999999999999')
+        self.assertEqual(status, 200)
+        self.assertEqual(data['values'], [])
+
+        with mock.patch('radar_app.views.get_storage', return_value=OrmStorage()):
+            status, data = self.get('sensor=S1&after=99999999999999999999')
+        self.assertEqual(status, 200)
@@ -0,0 +1,106 @@
+"""
+数据接入限流：按桥接器、以及桥接器下的每个传感器分别维护令牌桶，
+在任何数据库操作之前拒绝超额请求。
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+class TokenBucket:
+    """令牌桶：rate 为每秒补充的令牌数，capacity 为允许的突发量"""
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def consume(self, now, amount=1):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def retry_after(self, amount=1):
+        """距离下一个令牌可用的秒数"""
+        missing = amount - self.tokens
+        return max(0.0, missing / self.rate) if self.rate > 0 else 60.0
+
+
+class RateLimiter:
+    """
+    按 key 分桶的限流器。桶按最近使用排序，数量达到上限时淘汰最久未使用的桶，
+    大量新 key（例如伪造的来源地址）只会挤掉彼此，不会重置活跃桶的额度。
+    """
+
+    def __init__(self, rate, burst, max_keys=10000):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key, now=None):
+        """返回 (是否放行, 建议重试秒数)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                while len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+                bucket.updated = now
+            else:
+                self._buckets.move_to_end(key)
+            if bucket.consume(now):
+                return True, 0.0
+            return False, bucket.retry_after()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class StatsCounter:
+    """线程安全的计数器"""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+ingest_stats = StatsCounter()
+
+
+def get_limiter(scope):
+    """获取 'bridge' 或 'sensor' 作用域的限流器，速率取自 settings.RADAR_INGEST_RATE_LIMITS"""
+    limiter = _limiters.get(scope)
+    if limiter is None:
+        from django.conf import settings
+        rate, burst = settings.RADAR_INGEST_RATE_LIMITS[scope]
+        with _limiters_lock:
+            limiter = _limiters.setdefault(scope, RateLimiter(rate, burst))
+    return limiter
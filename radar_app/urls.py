@@ -3,6 +3,11 @@ from . import views
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('multi/', views.multi_dashboard, name='multi_dashboard'),
     path('api/radar-data/', views.receive_radar_data, name='receive_radar_data'),
+    path('api/history/', views.radar_history, name='radar_history'),
+    path('api/signal-quality/', views.signal_quality_view, name='signal_quality'),
+    path('api/focus-summary/', views.focus_summary, name='focus_summary'),
+    path('api/ingest-stats/', views.ingest_stats_view, name='ingest_stats'),
     path('api/test/', views.api_test, name='api_test'),
 ]
@@ -1,49 +1,200 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from .models import RadarSensor, RadarData
+from django.db.models import Count, DateTimeField, DurationField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from datetime import timedelta
+from .models import RadarSensor, FocusSession
+from .storage import get_storage
+from .storage.base import to_micros
+from .bridge_auth import authenticate_bridge
+from .throttling import get_limiter, ingest_stats
+from .signal_quality import quality_monitor
+from .focus_log import focus_monitor, focus_writer
+from .lifecycle import is_draining
+from .outbound import outbound_stats
 import json
+import math
+
+def _throttled(scope, retry_after):
+    ingest_stats.incr(f'throttled_{scope}')
+    response = JsonResponse({'success': False, 'error': '请求过于频繁'}, status=429)
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
 
 @csrf_exempt
 def receive_radar_data(request):
     """接收桥接器数据"""
     if request.method == 'POST':
+        if is_draining():
+            response = JsonResponse({'success': False, 'error': '服务器正在重启'}, status=503)
+            response['Retry-After'] = '5'
+            return response
+
+        # 鉴权和限流都在数据库操作之前完成
+        bridge = authenticate_bridge(request)
+        if bridge is None:
+            ingest_stats.incr('unauthorized')
+            return JsonResponse({'success': False, 'error': '桥接器令牌无效'}, status=401)
+
+        allowed, retry_after = get_limiter('bridge').allow(bridge)
+        if not allowed:
+            return _throttled('bridge', retry_after)
+
         try:
             data = json.loads(request.body)
+
+            # 传感器桶按 (桥接器, 传感器) 区分，一个桥接器无法耗尽其他桥接器同名传感器的额度
+            allowed, retry_after = get_limiter('sensor').allow((bridge, data['sensor_id']))
+            if not allowed:
+                return _throttled('sensor', retry_after)
             
-            sensor, created = RadarSensor.objects.get_or_create(
-                name=data['sensor_id'],
-                defaults={"display_name": f"雷达_{data['sensor_id'][-4:]}"}
-            )
-            
-            RadarData.objects.create(sensor=sensor, value=data['value'])
+            get_storage().append(data['sensor_id'], data['value'])
+            # 按传感器判定专注窗口，只有状态切换时才写入区间
+            focus_writer.record(focus_monitor.observe(data['sensor_id'], data['value']))
             
             # 发送到WebSocket
             from channels.layers import get_channel_layer
             from asgiref.sync import async_to_sync
+            from .consumers import broadcast_sensor_events
+            
+            events = [{
+                "type": "radar_data",
+                "sensor_id": data['sensor_id'],
+                "value": data['value'],
+                "timestamp": data['timestamp']
+            }]
+            # 信号质量状态变化时一并广播
+            quality_event = quality_monitor.observe(data['sensor_id'], data['value'])
+            if quality_event:
+                events.append(quality_event)
             
             channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                "radar_group",
-                {
-                    "type": "radar_data",
-                    "sensor_id": data['sensor_id'],
-                    "value": data['value'],
-                    "timestamp": data['timestamp']
-                }
-            )
+            async_to_sync(broadcast_sensor_events)(channel_layer, events)
             
+            ingest_stats.incr('accepted')
             return JsonResponse({'success': True})
             
         except Exception as e:
+            ingest_stats.incr('failed')
             return JsonResponse({'success': False, 'error': str(e)}, status=500)
     
     return JsonResponse({'success': False})
 
+def ingest_stats_view(request):
+    """接入计数（接受、失败、未授权与限流次数）和 WebSocket 发送队列计数"""
+    return JsonResponse({
+        'success': True,
+        'counters': ingest_stats.snapshot(),
+        'outbound': outbound_stats.snapshot(),
+    })
+
+def _json_array(chunks, column):
+    """逐块输出 JSON 数组，不把各块拼接成一个大列表"""
+    yield '['
+    first = True
+    for chunk in chunks:
+        if not len(chunk[column]):
+            continue
+        if not first:
+            yield ','
+        yield json.dumps(list(chunk[column]))[1:-1]
+        first = False
+    yield ']'
+
+def radar_history(request):
+    """
+    单个传感器最近 seconds 秒的原始数据，按时间升序，
+    每次最多 limit 个采样；返回的 next_after 不为空时，带上 after=next_after 继续读取
+    """
+    sensor = request.GET.get('sensor')
+    if not sensor:
+        return JsonResponse({'success': False, 'error': '缺少 sensor 参数'}, status=400)
+    end_us = to_micros(timezone.now())
+    try:
+        seconds = float(request.GET.get('seconds', 300))
+        if not math.isfinite(seconds):
+            raise ValueError(seconds)
+        seconds = min(max(seconds, 0), 7 * 24 * 3600)
+        limit = min(max(int(request.GET.get('limit', settings.RADAR_HISTORY_MAX_ROWS)), 1),
+                    settings.RADAR_HISTORY_MAX_ROWS)
+        start_us = end_us - int(seconds * 1_000_000)
+        after = request.GET.get('after')
+        if after:
+            # 游标不会超过当前时间，过大的值不能传到时间转换
+            start_us = max(start_us, min(int(after), end_us) + 1)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'seconds、limit 或 after 参数无效'}, status=400)
+    chunks = get_storage().read_range(sensor, start_us, end_us, limit=limit)
+    
+    count = sum(len(chunk_ts) for chunk_ts, _ in chunks)
+    next_after = chunks[-1][0][-1] if count >= limit else None
+    
+    def body():
+        yield f'{{"success": true, "sensor_id": {json.dumps(sensor)}, "count": {count}, "timestamps_us": '
+        yield from _json_array(chunks, 0)
+        yield ', "values": '
+        yield from _json_array(chunks, 1)
+        yield f', "next_after": {json.dumps(next_after)}}}'
+    
+    return StreamingHttpResponse(body(), content_type='application/json')
+
+def signal_quality_view(request):
+    """各传感器当前信号质量"""
+    return JsonResponse({'success': True, 'sensors': quality_monitor.snapshot()})
+
+def focus_summary(request):
+    """按传感器和状态汇总最近若干小时的专注区间"""
+    try:
+        hours = float(request.GET.get('hours', 24))
+        if not math.isfinite(hours):
+            raise ValueError(hours)
+        hours = min(max(hours, 0), 24 * 31)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'hours 参数无效'}, status=400)
+    
+    since = timezone.now() - timedelta(hours=hours)
+    sessions = FocusSession.objects.filter(ended_at__gte=since)
+    sensor = request.GET.get('sensor')
+    if sensor:
+        sessions = sessions.filter(sensor_name=sensor)
+    
+    rows = sessions.order_by().values('sensor_name', 'state').annotate(
+        # 跨越窗口起点的区间只统计窗口内的部分
+        duration=Sum(ExpressionWrapper(
+            F('ended_at') - Greatest(F('started_at'), Value(since, output_field=DateTimeField())),
+            output_field=DurationField()
+        )),
+        sessions=Count('id'),
+        samples=Sum('sample_count'),
+    )
+    summary = {}
+    for row in rows:
+        summary.setdefault(row['sensor_name'], {})[row['state']] = {
+            'seconds': row['duration'].total_seconds() if row['duration'] else 0,
+            'sessions': row['sessions'],
+            'samples': row['samples'] or 0,
+        }
+    return JsonResponse({'success': True, 'hours': hours, 'summary': summary})
+
 def index(request):
     """主页面"""
     return render(request, 'index.html')
 
+def multi_dashboard(request):
+    """多传感器面板，?sensors=a,b 指定要显示的传感器"""
+    selected = [s for s in request.GET.get('sensors', '').split(',') if s]
+    sensors = RadarSensor.objects.order_by('name')
+    if selected:
+        sensors = sensors.filter(name__in=selected)
+    sensors = [
+        {'name': s.name, 'display_name': str(s)}
+        for s in sensors[:50]
+    ]
+    return render(request, 'multi.html', {'sensors': sensors})
+
 @csrf_exempt
 def api_test(request):
     return JsonResponse({
@@ -7,19 +7,31 @@ For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
 import os
+import logging
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'radar_monitoring.settings')
 
 django_asgi_app = get_asgi_application()
 
+from django.conf import settings
+from channels.routing import ProtocolTypeRouter, URLRouter
+from radar_app.outbound import TransportBacklogMiddleware
 from radar_app.routing import websocket_urlpatterns
+
+websocket_app = URLRouter(websocket_urlpatterns)
+if not settings.IS_LEAN:
+    # 精简配置没有会话和认证，WebSocket 不需要用户信息
+    from channels.auth import AuthMiddlewareStack
+    websocket_app = AuthMiddlewareStack(websocket_app)
+
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
-    "websocket": AuthMiddlewareStack(
-        URLRouter(websocket_urlpatterns)
-    ),
+    # 必须在最外层，内层中间件会替换 daphne 原始的 send
+    "websocket": TransportBacklogMiddleware(websocket_app),
 })
-print("ASGI应用已初始化")
+
+from radar_app.lifecycle import install_drain_hooks, schedule_startup
+install_drain_hooks()
+schedule_startup()
+logging.getLogger(__name__).info("ASGI应用已初始化")
@@ -1,11 +1,14 @@
 import os
-import dj_database_url
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.environ.get('SECRET_KEY', 'django-insecure-k!i#5$z1x6f80=&&9+&c!p@4n_%js7@qc2-rh#rh0kwr6qku4f')
 DEBUG = os.environ.get('DEBUG', 'True').lower() == 'true'
 IS_RENDER = os.environ.get('RENDER') is not None
+# 运行配置：full 为完整站点；ingest 只保留数据接入、WebSocket 和页面，
+# 去掉后台、会话和消息框架以加快启动和请求处理
+RADAR_PROFILE = os.environ.get('RADAR_PROFILE', 'full').lower()
+IS_LEAN = RADAR_PROFILE == 'ingest'
 
 # ALLOWED_HOSTS
 if IS_RENDER:
@@ -15,7 +18,6 @@ if IS_RENDER:
     ]
 else:
     ALLOWED_HOSTS = ['*']
-print(f"ALLOWED_HOSTS: {ALLOWED_HOSTS}")
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth', 
@@ -38,6 +40,17 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+if IS_LEAN:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in (
+        'django.contrib.admin',
+        'django.contrib.sessions',
+        'django.contrib.messages',
+    )]
+    MIDDLEWARE = [mw for mw in MIDDLEWARE if mw not in (
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+    )]
 ROOT_URLCONF = 'radar_monitoring.urls'
 TEMPLATES = [
     {
@@ -48,9 +61,10 @@ TEMPLATES = [
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
+            ] + ([] if IS_LEAN else [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-            ],
+            ]),
         },
     },
 ]
@@ -59,32 +73,82 @@ WSGI_APPLICATION = 'radar_monitoring.wsgi.application'
 ASGI_APPLICATION = "radar_monitoring.asgi.application"
 
 # 数据库配置
-if IS_RENDER:
-    database_url = os.environ.get("DATABASE_URL")
-    if database_url:
-        DATABASES = {
-            'default': dj_database_url.parse(database_url, conn_max_age=600)
-        }
-    else:
-        DATABASES = {
-            'default': {
-                'ENGINE': 'django.db.backends.sqlite3',
-                'NAME': BASE_DIR / 'db.sqlite3',
+# 设置了 DATABASE_URL 时使用 PostgreSQL 持久连接，否则使用本地 SQLite
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '600'))
+database_url = os.environ.get("DATABASE_URL")
+if database_url:
+    import dj_database_url
+    DATABASES = {
+        'default': dj_database_url.parse(
+            database_url,
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=True,
+        )
+    }
+    # Django 5.1+ 可改用 psycopg 3 连接池（需安装 psycopg[pool]），
+    # 连接池与持久连接互斥，启用时关闭 CONN_MAX_AGE
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '0'))
+    if DB_POOL_MAX_SIZE:
+        import django
+        if django.VERSION >= (5, 1):
+            DATABASES['default']['CONN_MAX_AGE'] = 0
+            DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+                'min_size': min(2, DB_POOL_MAX_SIZE),
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': 10,
             }
-        }
 else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'OPTIONS': {
+                # 等待写锁的秒数（busy timeout），避免并发写入直接报 database is locked
+                'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', '20')),
+            },
         }
     }
+# 连接建立时为 SQLite 开启 WAL
+RADAR_SQLITE_WAL = os.environ.get('RADAR_SQLITE_WAL', 'True').lower() == 'true'
+# 异步消费者访问数据库的专用线程数，即每个进程的最大数据库连接数
+RADAR_DB_EXECUTOR_WORKERS = int(os.environ.get('RADAR_DB_EXECUTOR_WORKERS', '4'))
+# 重启排空：最长等待秒数、通知客户端后留给消费者的处理时间、客户端重连的随机延迟范围（毫秒）
+RADAR_DRAIN_TIMEOUT = float(os.environ.get('RADAR_DRAIN_TIMEOUT', '20'))
+RADAR_DRAIN_GRACE_SECONDS = float(os.environ.get('RADAR_DRAIN_GRACE_SECONDS', '1'))
+RADAR_RECONNECT_DELAY_MS = (3000, 15000)
+# 每个 WebSocket 连接的发送队列：策略为 drop_oldest / coalesce / disconnect；
+# 连接写缓冲区积压超过 max_backlog_bytes 时暂停发送，视为客户端跟不上
+RADAR_OUTBOUND_QUEUE = {
+    'policy': os.environ.get('RADAR_OUTBOUND_POLICY', 'coalesce'),
+    'max_size': int(os.environ.get('RADAR_OUTBOUND_MAX_SIZE', '200')),
+    'max_backlog_bytes': int(os.environ.get('RADAR_OUTBOUND_MAX_BACKLOG', '65536')),
+}
+# 信号质量检测阈值，未设置的项使用 radar_app.signal_quality.DEFAULTS
+RADAR_SIGNAL_QUALITY = {}
+# 雷达数据存储后端
+RADAR_STORAGE_BACKEND = os.environ.get('RADAR_STORAGE_BACKEND', 'radar_app.storage.orm.OrmStorage')
+# SegmentStorage 的数据目录和每个块覆盖的秒数
+RADAR_SEGMENT_DIR = os.environ.get('RADAR_SEGMENT_DIR', str(BASE_DIR / 'segments'))
+RADAR_SEGMENT_BLOCK_SECONDS = int(os.environ.get('RADAR_SEGMENT_BLOCK_SECONDS', '3600'))
+# 历史数据接口单次返回的最大采样数，超出部分通过 after 游标继续读取
+RADAR_HISTORY_MAX_ROWS = int(os.environ.get('RADAR_HISTORY_MAX_ROWS', '10000'))
 # Channels配置
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels.layers.InMemoryChannelLayer',
     },
 }
+# 数据接入鉴权与限流
+# 为 True 时拒绝未携带桥接器令牌的请求，否则匿名请求按客户端 IP 限流
+RADAR_INGEST_REQUIRE_TOKEN = os.environ.get('RADAR_INGEST_REQUIRE_TOKEN', 'False').lower() == 'true'
+# 已验证令牌在进程内缓存的秒数
+RADAR_BRIDGE_TOKEN_CACHE_TTL = int(os.environ.get('RADAR_BRIDGE_TOKEN_CACHE_TTL', '300'))
+# (每秒速率, 突发容量)
+RADAR_INGEST_RATE_LIMITS = {
+    'bridge': (float(os.environ.get('RADAR_BRIDGE_RATE', '20')), float(os.environ.get('RADAR_BRIDGE_BURST', '40'))),
+    'sensor': (float(os.environ.get('RADAR_SENSOR_RATE', '10')), float(os.environ.get('RADAR_SENSOR_BURST', '20'))),
+}
 # CORS配置
 CORS_ALLOW_ALL_ORIGINS = True
 
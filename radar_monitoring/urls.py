@@ -14,7 +14,6 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse, HttpResponse, HttpResponseRedirect
 from django.conf import settings
@@ -53,9 +52,6 @@ urlpatterns = [
     # 根路径 - 重定向到雷达界面
     path('', root_redirect, name='root'),
     
-    # 管理后台
-    path('admin/', admin.site.urls),
-    
     # 雷达应用所有路由
     path('radar/', include('radar_app.urls')),
     
@@ -65,6 +61,10 @@ urlpatterns = [
     # Favicon处理
     path('favicon.ico', favicon_view, name='favicon'),
 ]
+# 管理后台（精简配置下不加载）
+if not settings.IS_LEAN:
+    from django.contrib import admin
+    urlpatterns.insert(1, path('admin/', admin.site.urls))
 # 开发环境静态文件服务
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -12,5 +12,3 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'radar_monitoring.settings')
 application = get_wsgi_application()
-# 添加调试信息
-print("🚀 WSGI application initialized for Gunicorn")
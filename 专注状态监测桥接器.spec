@@ -10,9 +10,10 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # 桥接器用不到的标准库模块，减小单文件包解压量
+    excludes=['tkinter', 'unittest', 'pydoc', 'pydoc_data', 'lib2to3', 'sqlite3', 'xmlrpc', 'test'],
     noarchive=False,
-    optimize=0,
+    optimize=1,
 )
 pyz = PYZ(a.pure)
 
@@ -26,7 +27,8 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    # UPX 压缩的动态库每次启动都要解压，关闭以缩短冷启动
+    upx=False,
     upx_exclude=[],
     runtime_tmpdir=None,
     console=True,